@@ -0,0 +1,213 @@
+"""Latency and throughput of the parsing and conversion core.
+
+Each case runs a function over realistic and pathological corpora and records the
+latency distribution of every call. Results can be saved as JSON and compared to a
+stored baseline; the exit status is 1 if any case regressed past the threshold.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_core.py
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_core.py --output results.json
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_core.py --baseline benchmarks/baseline.json
+
+By default the parse cache is cleared before every call, so the full sympy pipeline
+is measured ; --warm measures repeated calls with the cache filled instead.
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sympyentrywidget import (ExprEdit, UnitEdit, DimensionEdit, SympyEntryWidget, units,
+                              parseExpr, parseUnits, getDimension, convertTo, unitsAreConsistent,
+                              parseCache, _sympyVersion)
+from tests import expr_safe_check, units_work_check, units_convert_check
+from PyQt5.QtWidgets import QApplication
+import argparse
+import platform
+import time
+import json
+
+app = QApplication.instance() or QApplication([])
+
+
+def keystrokes(text):
+    return [text[:i] for i in range(1, len(text) + 1)]
+
+
+def _parsed(texts):
+    rv = []
+    for t in texts:
+        try:
+            expr = parseUnits(t)
+        except ValueError:
+            continue
+        if expr is not None:
+            rv.append(expr)
+    return rv
+
+
+forms = ['3*mm + 1*inch', '1*b*mm', '2*cos(pi) + 20/5', 'sin(2*mm/(1*inch))', '3*inch / (1*foot)*mm']
+texts = {
+    'realistic': [e[0] for e in expr_safe_check] + [e[0] for e in units_work_check] +
+                 [e[0] for e in units_convert_check] + [k for f in forms for k in keystrokes(f)],
+    'pathological': [' + '.join(f'x{i}' for i in range(100)),
+                     ' + '.join(['1*mm'] * 100),
+                     '(' * 50 + '1*mm' + ')' * 50,
+                     '*'.join(['sin(x)'] * 50),
+                     'a' * 5000,
+                     'a1' * 2500 + '.',
+                     ')' * 2000,
+                     '1' * 1000 + '*inch'],
+}
+conversions = {
+    'realistic': [(t, target) for t, target, ok, _ in units_convert_check if ok] +
+                 [('3*mm + 1*inch', 'inch'), ('1*b*mm', 'm'), ('2*psi', 'MPa'), ('5*lbm', 'kg')],
+    'pathological': [(' + '.join(['1*mm'] * 100), 'inch'),
+                     (' + '.join(f'x{i}*mm' for i in range(50)), 'foot'),
+                     ('*'.join(['(1*mm/(1*inch))'] * 30), units.One)],
+}
+
+
+def _call(func, *args):
+    try:
+        func(*args)
+    except ValueError:  # ExpressionError, UnitMisMatchError
+        pass
+
+
+def cases():
+    """{case name: {corpus name: (function, list of argument tuples)}}"""
+    rv = {
+        'parseExpr': {k: (parseExpr, [(t,) for t in v]) for k, v in texts.items()},
+        'parseUnits': {k: (parseUnits, [(t,) for t in v]) for k, v in texts.items()},
+        'getDimension': {k: (getDimension, [(e,) for e in _parsed(v)]) for k, v in texts.items()},
+        'unitsAreConsistent': {k: (unitsAreConsistent, [(e,) for e in _parsed(v)]) for k, v in texts.items()},
+        'convertTo': {k: (convertTo, [(e, target) for t, target in v for e in _parsed([t])])
+                      for k, v in conversions.items()},
+    }
+
+    for cls, args in [(ExprEdit, {}), (UnitEdit, {}), (DimensionEdit, {'dimension': units.length}),
+                      (SympyEntryWidget, {'options': {'inch': units.inch, 'mm': units.mm}})]:
+        widget = cls(**args)
+
+        def errorCheck(text, widget=widget):
+            # set text without triggering errorCheck, so only the timed call evaluates it
+            lineEdit = getattr(widget, 'lineEdit', widget)
+            lineEdit.blockSignals(True)
+            lineEdit.setText(text)
+            lineEdit.blockSignals(False)
+            if not warm:
+                parseCache.clear()
+                widget._evaluator.lastKey = None  # or repeated text is skipped
+            start = time.perf_counter_ns()
+            widget.errorCheck(widget)
+            return time.perf_counter_ns() - start
+        errorCheck.timed = True
+        rv[f'{cls.__name__}.errorCheck'] = {k: (errorCheck, [(t,) for t in v]) for k, v in texts.items()}
+    return rv
+
+
+warm = False
+
+
+def measure(func, arglist, repeat):
+    """Latency of every call of `func` over `arglist`, `repeat` times, in ns ; one list per argument tuple."""
+    samples = [[] for _ in arglist]
+    for _ in range(repeat):
+        for i, args in enumerate(arglist):
+            if getattr(func, 'timed', False):
+                samples[i].append(func(*args))
+                continue
+            if not warm:
+                parseCache.clear()
+            start = time.perf_counter_ns()
+            _call(func, *args)
+            samples[i].append(time.perf_counter_ns() - start)
+    return samples
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def distribution(samples):
+    """Summary of latency `samples` (ns, per input), in microseconds, and throughput in calls/s.
+    `best_median_us` is the median over inputs of each input's fastest call, the least noisy
+    figure, and the one compared to a baseline.
+    """
+    best = [min(s) for s in samples]
+    samples = sorted(t for s in samples for t in s)
+    n = len(samples)
+
+    def pct(p):
+        return samples[min(n - 1, int(p * n))] / 1e3
+    total = sum(samples)
+    return {'calls': n, 'mean_us': total / n / 1e3, 'min_us': samples[0] / 1e3, 'median_us': pct(.5),
+            'p90_us': pct(.9), 'p99_us': pct(.99), 'max_us': samples[-1] / 1e3,
+            'best_median_us': _median(best) / 1e3,
+            'throughput': n / (total / 1e9) if total else float('inf')}
+
+
+def run(repeat=5, only=None):
+    results = dict()
+    for name, corpora in cases().items():
+        if only and not any(o in name for o in only):
+            continue
+        results[name] = dict()
+        for corpus, (func, arglist) in corpora.items():
+            if not arglist:
+                continue
+            _ = measure(func, arglist, 1)  # warm up imports and catalogs
+            results[name][corpus] = distribution(measure(func, arglist, repeat))
+    return {'meta': {'python': platform.python_version(), 'sympy': _sympyVersion, 'platform': platform.platform(),
+                     'repeat': repeat, 'warm': warm, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results}
+
+
+def compare(results, baseline, threshold):
+    """Print best_median_us ratios against `baseline`, return list of regressions past `threshold`."""
+    regressions = []
+    print(f"\n{'case':<28} {'corpus':<13} {'baseline':>11} {'now':>11} {'ratio':>7}")
+    for name, corpora in results['results'].items():
+        for corpus, stats in corpora.items():
+            base = baseline['results'].get(name, {}).get(corpus)
+            if base is None:
+                continue
+            ratio = stats['best_median_us'] / base['best_median_us'] if base['best_median_us'] else float('inf')
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressions.append((name, corpus, ratio))
+            print(f"{name:<28} {corpus:<13} {base['best_median_us']:>9.1f}us {stats['best_median_us']:>9.1f}us "
+                  f"{ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def report(results):
+    print(f"{'case':<28} {'corpus':<13} {'calls':>6} {'median':>10} {'p90':>10} {'p99':>10} {'max':>10} {'calls/s':>9}")
+    for name, corpora in results['results'].items():
+        for corpus, s in corpora.items():
+            print(f"{name:<28} {corpus:<13} {s['calls']:>6} {s['median_us']:>8.1f}us {s['p90_us']:>8.1f}us "
+                  f"{s['p99_us']:>8.1f}us {s['max_us']:>8.1f}us {s['throughput']:>9.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='passes over each corpus')
+    parser.add_argument('--warm', action='store_true', help='keep the parse cache between calls')
+    parser.add_argument('--only', nargs='*', help='run cases whose name contains any of these')
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--baseline', help='compare to results saved in this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown, 0.25 = 25%%')
+    opts = parser.parse_args()
+
+    warm = opts.warm
+    results = run(opts.repeat, opts.only)
+    report(results)
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            json.dump(results, f, indent=1)
+    if opts.baseline:
+        with open(opts.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, opts.threshold):
+            sys.exit(1)
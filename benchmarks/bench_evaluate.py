@@ -0,0 +1,45 @@
+"""Per-keystroke cost of each widget class's evaluation pipeline.
+
+Every prefix of each sample input is evaluated, as when typed one key at a time,
+with the parse cache cleared so the full sympy pipeline is measured.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_evaluate.py
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sympyentrywidget import (SymbolEdit, ExprEdit, UnitEdit, DimensionEdit, SympyEntryWidget,
+                              parseCache, units, dimensionVector)
+import time
+
+samples = {
+    SymbolEdit: (['symbol_name', 'text2a'], ()),
+    ExprEdit: (['2*cos(pi) + 20/5', 'sin(word)*(2**expon)', '1*a + 2*b - 1*a + cos(pi)'], ()),
+    UnitEdit: (['2*mm + 1*inch', 'sin(2*mm/(1*inch))', '5*mm+1*inch'], ()),
+    DimensionEdit: (['2*mm + 1*inch', '3*inch / (1*foot)*mm'], (units.length,)),
+    SympyEntryWidget: (['3*mm + 1*inch', '1*b*mm'], (units.inch, dimensionVector(units.inch))),
+}
+
+
+def keystrokes(text):
+    return [text[:i] for i in range(1, len(text) + 1)]
+
+
+def bench(cls, texts, args, repeat=3):
+    strokes = [t for text in texts for t in keystrokes(text)]
+    best = None
+    for _ in range(repeat):
+        parseCache.clear()
+        start = time.perf_counter()
+        for t in strokes:
+            cls._evaluate(t, *args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(strokes), len(strokes)
+
+
+if __name__ == '__main__':
+    for cls, (texts, args) in samples.items():
+        per, n = bench(cls, texts, args)
+        print(f"{cls.__name__:<18} {n:>4} keystrokes  {per * 1e3:8.3f} ms/keystroke")
@@ -0,0 +1,102 @@
+"""Throughput of unit conversion in each numeric mode.
+
+Converts units_convert_check-style values (parsed once, so parsing is not measured)
+with convertTo in each numeric mode, and runs SympyEntryWidget's evaluation of the
+same values, reporting calls per second and the speedup over the default mode
+(evalf with 15 digits), plus the largest relative difference of float64 results.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_numeric.py
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_numeric.py --values 2000 --modes exact 15 50 float64
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sympyentrywidget import (SympyEntryWidget, QuantityValue, convertTo, parseUnits, dimensionVector,
+                              _resolveUnit, _sympyVersion)
+from tests import units_convert_check
+import argparse
+import platform
+import time
+import json
+
+forms = [('{i}*mm', 'foot'), ('{i}*mm + 1*inch', 'foot'), ('{i}/4*foot', 'mm'), ('{i}*inch + 3*mm', 'inch'),
+         ('2*cos(pi)*{i}*mm', 'm'), ('3*inch / (1*foot)*{i}*mm', 'inch'), ('{i}*psi', 'MPa'), ('{i}*lbm', 'kg')]
+
+
+def corpus(n):
+    """[(text, target unit)], the valid conversions of units_convert_check first."""
+    rv = [(t, target) for t, target, ok, _ in units_convert_check if ok]
+    rv += [(text.format(i=i), target) for i in range(1, n + 1) for text, target in [forms[i % len(forms)]]]
+    return rv[:n]
+
+
+def _magnitude(value, target):
+    if isinstance(value, (QuantityValue, float)):
+        return float(value)
+    return float((value / _resolveUnit(target)).evalf())
+
+
+def run(n, modes, repeat):
+    texts = corpus(n)
+    values = [(parseUnits(text), target) for text, target in texts]  # fills the parse cache for _evaluate too
+    widgetArgs = [(text, _resolveUnit(target), dimensionVector(_resolveUnit(target))) for text, target in texts]
+    results = []
+    for mode in modes:
+        convert, evaluate = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = [convertTo(expr, target, mode) for expr, target in values]
+            elapsed = time.perf_counter() - start
+            convert = elapsed if convert is None else min(convert, elapsed)
+
+            start = time.perf_counter()
+            for text, unit, dim in widgetArgs:
+                SympyEntryWidget._evaluate(text, unit, dim, mode)
+            elapsed = time.perf_counter() - start
+            evaluate = elapsed if evaluate is None else min(evaluate, elapsed)
+        results.append({'mode': mode, 'convert_per_s': len(values) / convert, 'evaluate_per_s': len(values) / evaluate,
+                         'magnitudes': [_magnitude(v, t) if mode != 'exact' else None
+                                        for v, (_, t) in zip(out, values)]})
+
+    reference = next((r['magnitudes'] for r in results if r['mode'] == 15), None)
+    base = next((r for r in results if r['mode'] == 15), results[0])
+    for r in results:
+        r['convert_speedup'] = r['convert_per_s'] / base['convert_per_s']
+        r['evaluate_speedup'] = r['evaluate_per_s'] / base['evaluate_per_s']
+        magnitudes = r.pop('magnitudes')
+        r['max_rel_diff'] = None
+        if reference is not None and r['mode'] != 'exact':
+            r['max_rel_diff'] = max(abs(a - b) / abs(b) if b else abs(a) for a, b in zip(magnitudes, reference))
+    return {'meta': {'python': platform.python_version(), 'sympy': _sympyVersion, 'platform': platform.platform(),
+                     'values': len(values), 'repeat': repeat, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results}
+
+
+def report(results):
+    print(f"{results['meta']['values']} conversions")
+    print(f"{'mode':>8} {'convertTo/s':>12} {'speedup':>8} {'evaluate/s':>11} {'speedup':>8} {'max rel diff':>13}")
+    for r in results['results']:
+        diff = '' if r['max_rel_diff'] is None else f"{r['max_rel_diff']:.1e}"
+        print(f"{r['mode']:>8} {r['convert_per_s']:>12.0f} {r['convert_speedup']:>7.2f}x "
+              f"{r['evaluate_per_s']:>11.0f} {r['evaluate_speedup']:>7.2f}x {diff:>13}")
+
+
+def _mode(text):
+    return int(text) if text.isdigit() else text
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--values', type=int, default=1000, help='conversions per pass')
+    parser.add_argument('--modes', type=_mode, nargs='*', default=['exact', 15, 30, 'float64'],
+                        help="numeric modes: exact, float64 or digits of precision")
+    parser.add_argument('--repeat', type=int, default=3, help='passes, the fastest is reported')
+    parser.add_argument('--output', help='save results to this JSON file')
+    opts = parser.parse_args()
+
+    results = run(opts.values, opts.modes, opts.repeat)
+    report(results)
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            json.dump(results, f, indent=1)
@@ -0,0 +1,85 @@
+"""Scaling of ParserPool across worker counts.
+
+Validates a corpus of distinct values (so per-process parse caches do not help) in
+process, then in a ParserPool of each worker count, and reports throughput, speedup
+and parallel efficiency, plus the time to start a warm pool.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_pool.py
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_pool.py --values 50000 --workers 1 2 4 8 --output pool.json
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sympyentrywidget import ParserPool, validateValues, parseCache, _sympyVersion
+import argparse
+import platform
+import time
+import json
+
+forms = ['{i}*mm', '{i}*mm + 1*inch', '{i}/4*foot', '2*cos(pi)*{i}*mm', 'sin(2*mm/(1*inch))*{i}*m',
+         '3*inch / (1*foot)*{i}*mm', '{i}*kg', '{i}*x*mm']
+
+
+def corpus(n):
+    return [forms[i % len(forms)].format(i=i) for i in range(n)]
+
+
+def _consume(records):
+    errors = 0
+    for record in records:
+        errors += record['error'] is not None
+    return errors
+
+
+def run(n, workerCounts, chunkSize, unit='inch'):
+    values = corpus(n)
+    results = []
+
+    start = time.perf_counter()
+    errors = _consume(validateValues(values, unit, workers=1))
+    serial = time.perf_counter() - start
+    results.append({'workers': 0, 'start_s': 0., 'seconds': serial, 'values_per_s': n / serial,
+                    'speedup': 1., 'efficiency': 1., 'errors': errors})
+
+    for workers in workerCounts:
+        parseCache.clear()  # forked workers would inherit the serial run's results
+        start = time.perf_counter()
+        with ParserPool(workers, chunkSize) as pool:
+            started = time.perf_counter() - start
+            start = time.perf_counter()
+            errors = _consume(pool.validate(values, unit))
+            seconds = time.perf_counter() - start
+        results.append({'workers': workers, 'start_s': started, 'seconds': seconds, 'values_per_s': n / seconds,
+                        'speedup': serial / seconds, 'efficiency': serial / seconds / workers, 'errors': errors})
+    return {'meta': {'python': platform.python_version(), 'sympy': _sympyVersion, 'platform': platform.platform(),
+                     'cpus': os.cpu_count(), 'values': n, 'chunk_size': chunkSize,
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results}
+
+
+def report(results):
+    print(f"{results['meta']['values']} values, {results['meta']['cpus']} cpus")
+    print(f"{'workers':>8} {'start':>9} {'seconds':>9} {'values/s':>10} {'speedup':>8} {'efficiency':>10}")
+    for r in results['results']:
+        workers = r['workers'] or 'serial'
+        print(f"{workers:>8} {r['start_s']:>8.2f}s {r['seconds']:>8.2f}s {r['values_per_s']:>10.0f} "
+              f"{r['speedup']:>7.2f}x {r['efficiency']:>9.0%}")
+
+
+if __name__ == '__main__':
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--values', type=int, default=20000, help='corpus size')
+    parser.add_argument('--workers', type=int, nargs='*',
+                        default=sorted({1, 2, 4, cpus} | {w for w in (8, 16) if w <= cpus}),
+                        help='worker counts to measure')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='values sent to a worker at once')
+    parser.add_argument('--output', help='save results to this JSON file')
+    opts = parser.parse_args()
+
+    results = run(opts.values, opts.workers, opts.chunk_size)
+    report(results)
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            json.dump(results, f, indent=1)
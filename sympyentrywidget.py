@@ -1,20 +1,418 @@
 from entrywidget import EntryWidget, AutoColorLineEdit, \
     QHBoxLayout, DictComboBox, delegated
-from sympy import (Expr, Symbol, sympify, S,
+from sympy import (Basic, Symbol, sympify, srepr, S, Add, Mul, Pow, Integer, Float, Rational,
+                   count_ops, powsimp, signsimp, __version__ as _sympyVersion,
                    sin, cos, sinh, cosh, tan, tanh, exp,
                    asin, acos, asinh, acosh, atan, atanh, atan2)
 from sympy.core.function import FunctionClass as Function
 from sympy.physics import units
-from sympy.physics.units.util import check_dimensions, quantity_simplify
-from sympy.parsing.sympy_parser import parse_expr, TokenError
-from PyQt5.QtCore import pyqtProperty, pyqtSignal
+from sympy.physics.units.util import check_dimensions, quantity_simplify  # noqa: F401, check_dimensions is public
+from sympy.parsing.sympy_parser import (parse_expr, TokenError, standard_transformations,
+                                       untokenize, evaluateFalse, eval_expr)
+from PyQt5.QtCore import pyqtProperty, pyqtSignal, QObject, QRunnable, QThreadPool, QTimer
 from PyQt5 import QtWidgets
 from keyword import iskeyword
+import ast
+from tokenize import generate_tokens, NAME, NUMBER, OP, STRING, NEWLINE, NL, INDENT, DEDENT, ENDMARKER
+import tokenize
+from io import StringIO
+from collections import OrderedDict, namedtuple, deque
+from collections.abc import Mapping
+from bisect import bisect_left
+from fractions import Fraction
+from numbers import Number
+from functools import wraps
+import threading
+import subprocess
+import pickle
+import queue
+import sys
 import logging
+import copy
+import json
+import hashlib
+import os
 import re
+import time
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
+_traceHandler = None
+
+
+def setTraceHandler(handler):
+    """Opt in to structured trace events from the evaluation pipeline, instead of log messages.
+    `handler` is called once per stage, possibly from a QThreadPool worker, with a dict:
+        stage: 'safety', 'parse', 'simplify', 'dimension', 'convert' or 'evalf'
+        function: name of the function running the stage
+        duration: float, seconds
+        error: exception type name, only if the stage raised
+
+    :param handler: callable, or None to stop tracing
+    """
+    global _traceHandler
+    _traceHandler = handler
+
+
+_traceLocal = threading.local()  # .stages: list of (stage, duration) collected for a widget, see _collectStages
+
+
+def _tracing():
+    return _traceHandler is not None or getattr(_traceLocal, 'stages', None) is not None
+
+
+def _traceStart():
+    """perf_counter() when tracing, None otherwise."""
+    return time.perf_counter() if _tracing() else None
+
+
+def _trace(stage, function, start, error=None):
+    """Emit a trace event for `stage` begun at `start` (see _traceStart)."""
+    if start is None:
+        return
+    duration = time.perf_counter() - start
+    stages = getattr(_traceLocal, 'stages', None)
+    if stages is not None:
+        stages.append((stage, duration))
+    handler = _traceHandler
+    if handler is None:
+        return
+    event = dict(stage=stage, function=function, duration=duration)
+    if error is not None:
+        event['error'] = type(error).__name__
+    handler(event)
+
+
+def _traced(stage):
+    """Decorator emitting a trace event for `stage` per call, when tracing."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracing():
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                rv = func(*args, **kwargs)
+            except Exception as e:
+                _trace(stage, func.__name__, start, e)
+                raise
+            _trace(stage, func.__name__, start)
+            return rv
+        return wrapper
+    return decorator
+
+
+_CATALOG_FORMAT = 2
+_catalogSnapshot = None
+_unitDefinitionsKey = None
+
+
+def _unitDefinitions():
+    """Get a short hash of the units this module defines (name, abbreviation, dimension,
+    scale factor), so snapshots made with other definitions are not used.
+
+    :return: str
+    """
+    global _unitDefinitionsKey
+    if _unitDefinitionsKey is None:
+        SI = units.systems.SI
+        rv = []
+        for k, v in sorted(_storage.customUnits.items()):
+            if isinstance(v, units.Quantity):
+                rv.append([k, str(v.name), str(v.abbrev), str(SI.get_quantity_dimension(v)),
+                           str(SI.get_quantity_scale_factor(v))])
+            else:
+                rv.append([k, str(v)])
+        _unitDefinitionsKey = hashlib.sha1(json.dumps(rv).encode()).hexdigest()[:12]
+    return _unitDefinitionsKey
+
+
+def unitCatalogPath():
+    """Get path of the unit catalog snapshot for the installed sympy version and this module's units.
+    Directory is $SYMPYENTRYWIDGET_CACHE if set, otherwise the user cache directory.
+
+    :return: str
+    """
+    root = os.environ.get('SYMPYENTRYWIDGET_CACHE')
+    if not root:
+        cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        root = os.path.join(cache, 'sympyentrywidget')
+    return os.path.join(root, f'unit_catalog-sympy{_sympyVersion}-{_unitDefinitions()}.json')
+
+
+def _readCatalog(path):
+    """Get {category: {reference, dimension, units}} saved at `path`, only the categories
+    matching this sympy/catalog version, units and category references ; {} if none."""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.log(logging.DEBUG-1, '_readCatalog() -> %r', e)
+        return dict()
+    if data.get('format') != _CATALOG_FORMAT or data.get('sympy') != _sympyVersion or \
+            data.get('units') != _unitDefinitions():
+        logger.log(logging.DEBUG-1, '_readCatalog() -> %s does not match, ignored', path)
+        return dict()
+    references = {c.names[0]: str(c.reference) for c in _storage.categories.values()}
+    return {k: v for k, v in data.get('categories', {}).items() if references.get(k) == v.get('reference')}
+
+
+def _writeCatalog(path, categories):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(dict(format=_CATALOG_FORMAT, sympy=_sympyVersion, units=_unitDefinitions(),
+                       categories=categories), f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def _catalogEntry(category, scanned):
+    return dict(reference=str(category.reference), dimension=str(category.dimension.name),
+                units={k: str(units.systems.SI.get_quantity_scale_factor(v)) for k, v in scanned.items()})
+
+
+def _loadCatalogSnapshot():
+    """Get {category: [unit names]} from the snapshot at unitCatalogPath(),
+    or an empty dict if it is missing or does not match this sympy/catalog version."""
+    global _catalogSnapshot
+    if _catalogSnapshot is None:
+        _catalogSnapshot = {k: list(v['units']) for k, v in _readCatalog(unitCatalogPath()).items()}
+    return _catalogSnapshot
+
+
+def _saveCatalogCategory(category, scanned):
+    """Add the units `scanned` for `category` to the snapshot, so later processes skip the scan.
+    Failing to write is logged and ignored."""
+    path = unitCatalogPath()
+    try:
+        categories = _readCatalog(path)
+        categories[category.names[0]] = _catalogEntry(category, scanned)
+        _writeCatalog(path, categories)
+    except OSError as e:
+        logger.log(logging.DEBUG-1, '_saveCatalogCategory(%s) -> %r', category.names[0], e)
+
+
+def buildUnitCatalog(path=None):
+    """Scan sympy.physics.units for every unit category and save the
+    resolved catalog (unit names, dimension, scale factor per category).
+    The snapshot is used instead of scanning when categories are first accessed ;
+    categories scanned because they were missing from it are added as they are scanned.
+
+    :param path: str, file to write, defaults to unitCatalogPath()
+    :return: str, path written
+    """
+    global _catalogSnapshot
+    path = path or unitCatalogPath()
+    categories = dict()
+    for c in _storage.categories.values():
+        name = c.names[0]
+        if name not in categories:
+            categories[name] = _catalogEntry(c, c.scan())
+    _writeCatalog(path, categories)
+    _catalogSnapshot = None
+    return path
+
+
+class _lazyCatalog():
+    """Class attribute built by `build(cls)` on first access, then stored on the class
+    (under every name it was assigned to)."""
+    def __init__(self, build):
+        self.build = build
+        self.names = []
+
+    def __set_name__(self, owner, name):
+        self.names.append(name)
+
+    def __get__(self, instance, owner):
+        value = self.build(owner)
+        for name in self.names:
+            setattr(owner, name, value)
+        return value
+
+
+class _CompositeUnits(Mapping):
+    """Read-only dict {'<a><sep><b>': units} of every pair of units from the `first` and
+    `second` families, '/' dividing and '-' multiplying them. Nothing is stored but the
+    units looked up so far: a key is split and found in the component families, and
+    iterating generates the pairs.
+
+    :param first: dict {name: units.Quantity}
+    :param second: dict {name: units.Quantity}
+    :param sep: str, '/' or '-'
+    :param exclude: names of `second` left out of the pairs
+    """
+    def __init__(self, first, second, sep, exclude=()):
+        self.first = first
+        self.second = second
+        self.sep = sep
+        self.exclude = frozenset(exclude)
+        self._found = dict()
+
+    def _combine(self, a, b):
+        return a / b if self.sep == '/' else a * b
+
+    def __getitem__(self, key):
+        try:
+            return self._found[key]
+        except (KeyError, TypeError):
+            pass
+        if isinstance(key, str):
+            at = key.find(self.sep)
+            while at > 0:
+                a, b = key[:at], key[at + 1:]
+                if a in self.first and b in self.second and b not in self.exclude:
+                    rv = self._found[key] = self._combine(self.first[a], self.second[b])
+                    return rv
+                at = key.find(self.sep, at + 1)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        for a in self.first:
+            for b in self.second:
+                if b not in self.exclude:
+                    yield a + self.sep + b
+
+    def __len__(self):
+        return len(self.first) * len([b for b in self.second if b not in self.exclude])
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self)} units)'
+
+
+class _compositeCatalog(_lazyCatalog):
+    """Lazy _CompositeUnits of families `first` and `second` of the owner class."""
+    def __init__(self, first, second, sep, exclude=()):
+        _lazyCatalog.__init__(self, lambda cls: _CompositeUnits(getattr(cls, first), getattr(cls, second),
+                                                                sep, exclude))
+
+
+class _unitCategory(_lazyCatalog):
+    """Lazy dict {name: units.Quantity} of all units sharing the dimension of `reference`.
+
+    :param reference: units.Quantity or units.Dimension
+    :param extra: callable(cls) -> dict, merged into the category when built
+    """
+    def __init__(self, reference, extra=None):
+        _lazyCatalog.__init__(self, self._build)
+        self.reference = reference
+        self.extra = extra
+
+    @property
+    def dimension(self):
+        if isinstance(self.reference, units.Dimension):
+            return self.reference
+        return self.reference.dimension
+
+    def scan(self):
+        """Get {name: units.Quantity} of the category by scanning sympy.physics.units."""
+        return {k: getattr(units, k) for k in units.find_unit(self.reference)}
+
+    def _build(self, owner):
+        names = _loadCatalogSnapshot().get(self.names[0])
+        rv = {k: getattr(units, k, None) for k in names} if names is not None else None
+        if rv is None or not all(isinstance(v, units.Quantity) for v in rv.values()):
+            rv = self.scan()
+            _saveCatalogCategory(self, rv)
+        if self.extra is not None:
+            rv.update(self.extra(owner))
+        return rv
+
+
+class _UnitSubs(dict):
+    """dict {name: units.Quantity} of the units in `categories` of `catalog`.
+
+    Entries are resolved one name at a time on lookup, so parsing text only pays
+    for the names it uses. Iterating, measuring or copying the dict builds
+    every category first.
+    """
+    def __init__(self, catalog, categories):
+        dict.__init__(self)
+        self._catalog = catalog
+        self._categories = list(categories)
+        self._dimensions = None
+        self._complete = False
+
+    def addCategory(self, name):
+        """Recognize the units of category `name` (see _storage.categories) as well.
+        Clears what was derived from the previous names: parseCache, composite units, aliases.
+        """
+        global _quantitiesByName
+        if name not in self._catalog.categories:
+            raise KeyError(f"Unknown unit category '{name}'")
+        if name not in self._categories:
+            self._categories.append(name)
+            self._dimensions = None
+            self._complete = False
+            parseCache.clear()
+            CommonUnits._resolved.clear()
+            unitAliases.invalidate()
+            _quantitiesByName = None
+
+    def _resolve(self, key):
+        if self._complete or not isinstance(key, str):
+            return False
+        if self._dimensions is None:
+            self._dimensions = {self._catalog.categories[c].dimension for c in self._categories}
+        value = getattr(units, key, None)
+        if isinstance(value, units.Quantity) and value.dimension in self._dimensions:
+            dict.__setitem__(self, key, value)
+            return True
+        return False
+
+    def _build(self):
+        if not self._complete:
+            for name in self._categories:
+                for k, v in getattr(self._catalog, name).items():
+                    if isinstance(v, (units.Dimension, units.Quantity)):
+                        dict.setdefault(self, k, v)
+            self._complete = True
+        return self
+
+    def __missing__(self, key):
+        if self._resolve(key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or self._resolve(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        return dict.__iter__(self._build())
+
+    def __len__(self):
+        return dict.__len__(self._build())
+
+    def __repr__(self):
+        return dict.__repr__(self._build())
+
+    def __eq__(self, other):
+        return dict.__eq__(self._build(), other)
+    __hash__ = None
+
+    def keys(self):
+        return dict.keys(self._build())
+
+    def values(self):
+        return dict.values(self._build())
+
+    def items(self):
+        return dict.items(self._build())
+
+    def copy(self):
+        return dict(self.items())
 
 
 class _storage:
@@ -58,51 +456,49 @@ class _storage:
     lbm = units.pound
     distance = units.length
     Hertz = units.hertz
+    customUnits = dict()  # {name: units.Quantity or units.Dimension} set on sympy.physics.units
     for k, v in locals().copy().items():
         if isinstance(v, (units.Quantity, units.Dimension)):
             setattr(units, k, v)
+            customUnits[k] = v
             del locals()[k]
-
-    lengths = distances = {k:getattr(units, k) for k in units.find_unit(units.inch)}
-    areas = {k + '^2': v ** 2 for k, v in lengths.items()}
-    accelerations = {k:getattr(units, k) for k in units.find_unit(units.gee)}
-    pressures = {k:getattr(units, k) for k in units.find_unit(units.pascal)}
-    masses = {k:getattr(units, k) for k in units.find_unit(units.gram)}
-    forces = weights = {k:getattr(units, k) for k in units.find_unit(units.newton)}
-    times = {k:getattr(units, k) for k in units.find_unit(units.minute)}
-    angles = {k: getattr(units, k) for k in units.find_unit(units.radian)}
-    # velocities = {k: getattr(units, k) for k in units.find_unit(units.speed)}
-    # frequencies = {k: getattr(units, k) for k in units.find_unit(units.hertz)}
-    # information = {k: getattr(units, k) for k in units.find_unit(units.byte)}
-    # powers = {k: getattr(units, k) for k in units.find_unit(units.power)}
-    # voltages = {k: getattr(units, k) for k in units.find_unit(units.volts)}
-    # currents = {k: getattr(units, k) for k in units.find_unit(units.ampere)}
-    # charges = {k: getattr(units, k) for k in units.find_unit(units.coulomb)}
-    # lights = {k: getattr(units, k) for k in units.find_unit(units.luminosity)}
-    # resistances = {k: getattr(units, k) for k in units.find_unit(units.ohm)}
-    # amounts = {k: getattr(units, k) for k in units.find_unit(units.mol)}
-    # temperatures = {k: getattr(units, k) for k in units.find_unit(units.kelvin)}
-    # magneticdensities = {k: getattr(units, k) for k in units.find_unit(units.tesla)}
-    # magneticfluxes = {k: getattr(units, k) for k in units.find_unit(units.weber)}
-    # energies = {k: getattr(units, k) for k in units.find_unit(units.electronvolt)}
-    # capacitances = {k: getattr(units, k) for k in units.find_unit(units.farad)}
-    # inductances = {k: getattr(units, k) for k in units.find_unit(units.henry)}
-
-    volumes = {k: getattr(units, k) for k in units.find_unit(units.liter)}
-    volumes.update({k + '^3': v ** 3 for k, v in lengths.items()})
-
-    unit_subs = dict()
-    for name, d in locals().copy().items():
-        if not isinstance(d, dict) or name == 'unit_subs':
-            continue
-        for k, v in d.items():
-            if isinstance(v, (units.Dimension, units.Quantity)):
-                unit_subs[k] = v
-    del d, k, v
-    dimensions = {k: v for k, v in vars(units).items() if isinstance(v, units.Dimension)}
+    del k, v
     units.One = S.One
 
-
+    # unit categories are built on first access, see _unitCategory
+    lengths = distances = _unitCategory(units.inch)
+    areas = _lazyCatalog(lambda cls: {k + '^2': v ** 2 for k, v in cls.lengths.items()})
+    accelerations = _unitCategory(units.gee)
+    pressures = _unitCategory(units.pascal)
+    masses = _unitCategory(units.gram)
+    forces = weights = _unitCategory(units.newton)
+    times = _unitCategory(units.minute)
+    angles = _unitCategory(units.radian)
+    velocities = _unitCategory(units.speed)
+    frequencies = _unitCategory(units.hertz)
+    information = _unitCategory(units.byte)
+    powers = _unitCategory(units.power)
+    voltages = _unitCategory(units.volts)
+    currents = _unitCategory(units.ampere)
+    charges = _unitCategory(units.coulomb)
+    lights = _unitCategory(units.luminosity)
+    resistances = _unitCategory(units.ohm)
+    amounts = _unitCategory(units.mol)
+    temperatures = _unitCategory(units.kelvin)
+    magneticdensities = _unitCategory(units.tesla)
+    magneticfluxes = _unitCategory(units.weber)
+    energies = _unitCategory(units.electronvolt)
+    capacitances = _unitCategory(units.farad)
+    inductances = _unitCategory(units.henry)
+    volumes = _unitCategory(units.liter, extra=lambda cls: {k + '^3': v ** 3 for k, v in cls.lengths.items()})
+
+    dimensions = _lazyCatalog(lambda cls: {k: v for k, v in vars(units).items() if isinstance(v, units.Dimension)})
+
+
+_storage.categories = {k: v for k, v in vars(_storage).items() if isinstance(v, _unitCategory)}
+# categories whose unit names are recognized when parsing text
+_storage.unit_subs = _UnitSubs(_storage, ['lengths', 'accelerations', 'pressures', 'masses',
+                                          'forces', 'times', 'angles', 'volumes'])
 unitSubs = _storage.unit_subs
 _modded_special_types = (exp, sin, cos, sinh, cosh, tan, tanh, asin, acos, asinh, acosh, atan, atanh, atan2)
 dim1 = units.Dimension(1).name
@@ -110,6 +506,86 @@ for t in _modded_special_types:
     setattr(t, 'name', dim1)
 
 
+_Scan = namedtuple('_Scan', 'tokens unsafe position complete')
+# string literals are rejected as unsafe: evaluated text has no use for them, and they would
+# hand arbitrary text to anything that evaluates str
+_stringTokens = frozenset(t for t in (STRING, getattr(tokenize, 'FSTRING_START', None)) if t is not None)
+_identifierChars = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+
+
+def _scanTail(text, offset):
+    """Find '.' attribute access in `text` the tokenizer could not read, one character at a time.
+
+    :return: (unsafe str, position) or None
+    """
+    for i, c in enumerate(text):
+        if c != '.':
+            continue
+        left = text[i - 1] if i > 0 else ''
+        right = text[i + 1] if i + 1 < len(text) else ''
+        if (left and (left in _identifierChars and not left.isdigit() or left in ')]')) \
+                or (right and (right in _identifierChars and not right.isdigit() or right == '(')):
+            return text[max(i - 1, 0):i + 2], offset + i
+    return None
+
+
+def scanExpr(text):
+    """Tokenize `text` in one pass, finding unsafe use of '.' attribute access, and string literals.
+    Runs in linear time. The tokens are what parseExpr and parseUnits hand to sympy's parser.
+
+    :param text: str
+    :return: namedtuple (tokens: list of (type, str), unsafe: str or None,
+        position: index of `unsafe` in `text` or None, complete: bool, False if tokenizing failed)
+    """
+    stripped = text.strip()
+    lead = len(text) - len(text.lstrip())
+    lines = [0]
+    for line in stripped.splitlines(True):
+        lines.append(lines[-1] + len(line))
+
+    found = list()
+    complete = True
+    try:
+        for tok in generate_tokens(StringIO(stripped).readline):
+            found.append(tok)
+    except (TokenError, SyntaxError):  # unbalanced brackets, or text the tokenizer rejects
+        complete = False
+
+    def offset(rowcol):
+        return lead + lines[rowcol[0] - 1] + rowcol[1]
+
+    def adjacent(a, b):
+        return a.end == b.start
+
+    unsafe = None
+    for i, tok in enumerate(found):
+        prev = found[i - 1] if i > 0 and adjacent(found[i - 1], tok) else None
+        nxt = found[i + 1] if i + 1 < len(found) and adjacent(tok, found[i + 1]) else None
+        if tok.type == OP and tok.string == '.' or tok.type in _stringTokens:
+            pass
+        elif tok.type == NUMBER and '.' in tok.string:
+            # '.' of a decimal number written against a name, e.g. `a.1`, `1.a`, `x).5`
+            if not ((prev is not None and tok.string.startswith('.') and
+                     (prev.type == NAME or prev.string in ')]')) or
+                    (nxt is not None and (nxt.type == NAME or nxt.string == '('))):
+                continue
+        else:
+            continue
+        first, last = (tok, tok) if tok.type in _stringTokens else (prev or tok, nxt or tok)
+        start, end = offset(first.start), offset(last.end)
+        unsafe = (text[start:end], start)
+        break
+
+    if unsafe is None and not complete:
+        tail = offset(found[-1].end) if found else lead
+        unsafe = _scanTail(text[tail:lead + len(stripped)], tail)
+
+    tokens = [(tok.type, tok.string) for tok in found]
+    if unsafe is None:
+        return _Scan(tokens, None, None, complete)
+    return _Scan(tokens, unsafe[0], unsafe[1], complete)
+
+
 def expr_is_safe(expr_string):
     """Returns unsafe usage of '.' attribute access, if present, `None` otherwise.
 
@@ -117,17 +593,7 @@ def expr_is_safe(expr_string):
     :return: `None` if safe, unsafe str otherwise
     """
     assert isinstance(expr_string, str), 'Provide a string expression to verify is safe'
-    # for r in '()+-*/':
-    #     expr_string = expr_string.replace(r, " "+r+" ")
-    # res = re.findall(r"((((?=\D)\S)+\d*)+[.])|([.]\d*((?=[\D])\S)+)", expr_string)
-
-    res = re.findall(r"((\d*[[a-zA-Z_\)]+\d*]*[.])|([.]\d*[a-zA-Z_\(]+\d*))", expr_string)
-
-    if res:
-        res = max(*res, key=len)
-    else:
-        res = None
-    return res
+    return scanExpr(expr_string).unsafe
 
 
 class UnitMisMatchError(ValueError):
@@ -139,35 +605,362 @@ class ExpressionError(ValueError):
     pass
 
 
+class CycleError(ValueError):
+    """Expressions depend on each other in a cycle, see FormGraph."""
+    pass
+
+
+class ParseCache():
+    """Bounded LRU cache for results of the parsing functions.
+
+    Results are keyed on (function name, normalized text, extra arguments).
+    Both successful results and raised ExpressionError/UnitMisMatchError are
+    stored, so repeated invalid text is rejected without parsing again.
+
+    Methods:
+        cached: decorator adding the cache to a parsing function
+        info: get dict of hits, misses, evictions, size, maxsize
+        clear: remove all entries and reset counters
+        resize: change maximum number of entries (0 disables caching)
+    """
+    cachedErrors = (ExpressionError, UnitMisMatchError)
+
+    def __init__(self, maxsize=1024):
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.maxsize = maxsize
+        self.hits = self.misses = self.evictions = 0
+
+    def cached(self, normalize=None):
+        """Decorator adding the cache to `func(text, *args)`.
+
+        :param normalize: callable(text) -> str, applied to text before
+            lookup and before calling the function
+        :return: decorator
+        """
+        def decorator(func):
+            name = func.__name__
+
+            @wraps(func)
+            def wrapper(text, *args, **kwargs):
+                if normalize is not None and isinstance(text, str):
+                    text = normalize(text)
+                key = (name, text, *args, *sorted(kwargs.items()))
+                try:
+                    hash(key)
+                except TypeError:
+                    return func(text, *args, **kwargs)
+                with self._lock:
+                    try:
+                        isError, result = self._data[key]
+                    except KeyError:
+                        self.misses += 1
+                    else:
+                        self._data.move_to_end(key)
+                        self.hits += 1
+                        if isError:
+                            raise copy.copy(result)  # a fresh instance, so tracebacks are not shared
+                        return result
+                try:
+                    result = func(text, *args, **kwargs)
+                except self.cachedErrors as e:
+                    self._store(key, (True, copy.copy(e).with_traceback(None)))
+                    raise
+                self._store(key, (False, result))
+                return result
+            return wrapper
+        return decorator
+
+    def _store(self, key, value):
+        with self._lock:
+            if self.maxsize <= 0:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def info(self):
+        """Get cache statistics.
+
+        :return: dict(hits, misses, evictions, size, maxsize)
+        """
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                        size=len(self._data), maxsize=self.maxsize)
+
+    def clear(self):
+        """Remove all cached results and reset counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def resize(self, maxsize):
+        """Change the maximum number of cached results, evicting the oldest as needed.
+
+        :param maxsize: int, 0 disables caching
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+
+parseCache = ParseCache()
+
+
+def _normalizeExprText(text):
+    text = text.replace('^', '**')
+    return text.strip() or text
+
+
 class CommonUnits():
     """
-    Set of pre-built dicts {key:sympy.physics.units.Quantity}
+    Set of dicts {key:sympy.physics.units.Quantity}, each built on first access
     dicts:
-        length, mass, area, force, acceleration, volume, pressure
-    """
-    length = distance = {k:unitSubs[k] for k in ['mm', 'cm', 'inch', 'ft', 'yard', 'm']}
-    mass = {k:unitSubs[k] for k in ['gram', 'mg', 'lbm', 'kg']}
-    area = {k+'^2':unitSubs[k]**2 for k in length.keys()}
-    force = weight = {k:unitSubs[k] for k in ['N', 'kN', 'lbf']}
-    acceleration = {'g':units.gee, 'm/s^2':units.m/units.second**2, 'ft/s^2':units.feet/units.second**2}
-    volume = {k:unitSubs[k] for k in ['ml', 'cl', 'liter', 'USgal']}
-    volume.update({k+'^3':unitSubs[k]**3 for k in length.keys()})
-    pressure = {k:unitSubs[k] for k in ['Pa', 'kPa', 'MPa', 'atm', 'psi', 'bar', 'mmHg', 'pa', 'torr']}
-    density = dict()
-    for m,M in mass.items():
-        for v,V in volume.items():
-            if v in ['yard^3']:
-                continue
-            k = '/'.join([m,v])
-            density[k] = M/V
-    torque = dict()
-    for f,F in force.items():
-        for d,D in distance.items():
-            if d in ['yard']:
-                continue
-            k = '-'.join([f,d])
-            torque[k] = F*D
-    moment = torque
+        length, mass, area, force, acceleration, volume, pressure, time
+    composite dicts, pairs of units generated from the families above on access:
+        density (mass/volume), torque (force-length), velocity (length/time), flowRate (volume/time)
+
+    resolve(key) gets the units of any key of a family, or a composite key such as
+    'kg/m^3', 'N-mm' or 'lbf*ft/s^2' built from the units of the families and unitSubs.
+    """
+    families = ('length', 'mass', 'area', 'force', 'acceleration', 'volume', 'pressure', 'time',
+                'density', 'torque', 'velocity', 'flowRate')
+    length = distance = _lazyCatalog(lambda cls: {k: unitSubs[k] for k in ['mm', 'cm', 'inch', 'ft', 'yard', 'm']})
+    mass = _lazyCatalog(lambda cls: {k: unitSubs[k] for k in ['gram', 'mg', 'lbm', 'kg']})
+    area = _lazyCatalog(lambda cls: {k + '^2': unitSubs[k] ** 2 for k in cls.length.keys()})
+    force = weight = _lazyCatalog(lambda cls: {k: unitSubs[k] for k in ['N', 'kN', 'lbf']})
+    acceleration = _lazyCatalog(lambda cls: {'g': units.gee, 'm/s^2': units.m / units.second ** 2,
+                                             'ft/s^2': units.feet / units.second ** 2})
+    pressure = _lazyCatalog(lambda cls: {k: unitSubs[k] for k in
+                                         ['Pa', 'kPa', 'MPa', 'atm', 'psi', 'bar', 'mmHg', 'pa', 'torr']})
+    time = _lazyCatalog(lambda cls: {k: unitSubs[k] for k in ['s', 'minute', 'hour']})
+
+    @_lazyCatalog
+    def volume(cls):
+        rv = {k: unitSubs[k] for k in ['ml', 'cl', 'liter', 'USgal']}
+        rv.update({k + '^3': unitSubs[k] ** 3 for k in cls.length.keys()})
+        return rv
+
+    density = _compositeCatalog('mass', 'volume', '/', exclude=['yard^3'])
+    torque = moment = _compositeCatalog('force', 'distance', '-', exclude=['yard'])
+    velocity = _compositeCatalog('length', 'time', '/')
+    flowRate = _compositeCatalog('volume', 'time', '/')
+
+    _resolved = dict()  # {composite key: units} parsed by resolve
+
+    @classmethod
+    def resolve(cls, key):
+        """Get the units of `key`, a key of any family, or a composite key: names of units
+        (of a family or unitSubs), each with an optional integer exponent ('^' or '**'),
+        joined by '/' to divide, and '-' or '*' to multiply ; 'kg/m^3', 'N-mm', 'm/s/s'.
+
+        :param key: str
+        :raises KeyError: if `key` is not made of known units
+        :return: sympy.Expr
+        """
+        for family in cls.families:
+            found = getattr(cls, family).get(key)
+            if found is not None:
+                return found
+        try:
+            return cls._resolved[key]
+        except KeyError:
+            pass
+        rv = cls._parseComposite(key)
+        if len(cls._resolved) >= 1024:
+            cls._resolved.clear()
+        cls._resolved[key] = rv
+        logger.log(logging.DEBUG-1, 'CommonUnits.resolve(%s) -> %s', key, rv)
+        return rv
+
+    @classmethod
+    def _component(cls, name):
+        found = unitSubs.get(name)
+        if found is None:
+            found = unitAliases.alias(name)
+        if found is not None:
+            return found
+        for family in cls.families[:cls.families.index('density')]:
+            found = getattr(cls, family).get(name)
+            if found is not None:
+                return found
+        return None
+
+    @classmethod
+    def _parseComposite(cls, key):
+        rv = S.One
+        parts = _compositeSplit.split(key.replace('**', '^').replace(' ', ''))
+        ops = ['*'] + parts[1::2]
+        for op, part in zip(ops, parts[::2]):
+            found = cls._component(part)
+            if found is None:
+                name, _, power = part.partition('^')
+                found = cls._component(name)
+                try:
+                    found = found ** int(power.strip('()')) if found is not None else None
+                except ValueError:
+                    found = None
+            if found is None:
+                raise KeyError(key)
+            rv = rv / found if op == '/' else rv * found
+        return rv
+
+
+_compositeSplit = re.compile(r'(?<![\^(])([/*-])')
+
+
+class UnitAliases():
+    """Index of alternative names of the units of unitSubs and CommonUnits, consulted by
+    convertTo and unitsAreConsistent before parsing a unit name.
+
+    Aliases are plurals ('kgs', 'inches'), common abbreviations, spellings and capitalizations
+    ('in', 'lbs', 'metre', 'MPA'), and case-insensitive spelled-out names ('Meters', 'INCHES').
+    Abbreviations made of a prefix and a symbol are case-sensitive: 'Mm' is not 'mm'. Compound
+    names are normalized ('m / s**2', 'kg m/s^2', 'N·m') and resolved by CommonUnits.resolve,
+    their names looked up here. The index is built on the first lookup unitSubs misses.
+
+    Methods:
+        lookup: get the units of a name, counting how it was found
+        alias: get the units of an alias, not counting
+        info: get dict of exact, alias, compound and fallback lookups, and size
+        clear: reset counters and rebuild the index on next lookup
+    """
+    abbreviations = {'in': 'inch', 'lb': 'lbm', 'lbs': 'lbm', 'metre': 'meter', 'litre': 'liter',
+                     'gal': 'USgal', 'gallon': 'USgal', 'µm': 'um', 'μm': 'um', 'sqft': 'ft^2', 'sqin': 'inch^2',
+                     'KG': 'kg', 'KPA': 'kPa', 'MPA': 'MPa', 'GPA': 'GPa'}
+    irregular = {'foot': 'feet', 'inch': 'inches'}
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._names = None  # {alias: units}
+        self._folded = None  # {casefolded spelled-out name: units, None if ambiguous}
+        self._categories = 0
+        self.exact = self.aliased = self.compound = self.fallback = 0
+
+    @classmethod
+    def _plural(cls, name):
+        if name in cls.irregular:
+            return cls.irregular[name]
+        if len(name) < 2 or not name.isalpha() or not name.islower() or name.endswith('s'):
+            return None
+        return name + 'es' if name.endswith(('x', 'z', 'ch', 'sh')) else name + 's'
+
+    @classmethod
+    def _spelled(cls, name, value):
+        """Whether `name` is the spelled-out name of units.Quantity `value` ('meter', 'inches')."""
+        return isinstance(value, units.Quantity) and name in (str(value), cls._plural(str(value)))
+
+    def _build(self):
+        with self._lock:
+            if self._names is not None and self._categories == len(unitSubs._categories):
+                return
+            real = dict(unitSubs)
+            for family in CommonUnits.families:
+                family = getattr(CommonUnits, family)
+                if isinstance(family, dict):
+                    for k, v in family.items():
+                        real.setdefault(k, v)
+            names = dict()
+            for alias, name in self.abbreviations.items():
+                if name in real:
+                    names[alias] = real[name]
+            for name, value in list(real.items()) + list(names.items()):
+                plural = self._plural(name)
+                if plural is not None:
+                    names.setdefault(plural, value)
+            names = {k: v for k, v in names.items() if k not in real}
+            folded = dict()
+            for name, value in list(real.items()) + list(names.items()):
+                if not self._spelled(name, value):
+                    continue
+                key = name.casefold()
+                if folded.get(key, value) != value:
+                    value = None
+                folded[key] = value
+            self._names, self._folded = names, folded
+            self._categories = len(unitSubs._categories)
+            logger.log(logging.DEBUG-1, 'UnitAliases built, %s aliases', len(names))
+
+    def alias(self, name):
+        """Get the units of alias `name`, or None.
+
+        :param name: str
+        :return: sympy.Expr or None
+        """
+        if self._names is None or self._categories != len(unitSubs._categories):
+            self._build()
+        found = self._names.get(name)
+        if found is None:
+            found = self._folded.get(name.casefold())
+        return found
+
+    def lookup(self, name):
+        """Get the units of `name`: a name of unitSubs, an alias, or a compound name
+        (see CommonUnits.resolve). Counts which way it was found, or that the parser
+        has to be used instead (fallback).
+
+        :param name: str
+        :return: sympy.Expr or None
+        """
+        try:
+            found = unitSubs[name]
+        except KeyError:
+            pass
+        else:
+            self.exact += 1
+            return found
+        key = _normalizeUnitName(name)
+        found = self.alias(key)
+        if found is not None:
+            self.aliased += 1
+            return found
+        try:
+            found = CommonUnits.resolve(key)
+        except KeyError:
+            self.fallback += 1
+            logger.log(logging.DEBUG-1, 'UnitAliases.lookup(%s) falls back to parsing', name)
+            return None
+        self.compound += 1
+        return found
+
+    def info(self):
+        """Get lookup statistics.
+
+        :return: dict(exact, alias, compound, fallback, size)
+        """
+        return dict(exact=self.exact, alias=self.aliased, compound=self.compound, fallback=self.fallback,
+                    size=0 if self._names is None else len(self._names))
+
+    def clear(self):
+        """Reset counters, and rebuild the index on next lookup."""
+        with self._lock:
+            self.invalidate()
+            self.exact = self.aliased = self.compound = self.fallback = 0
+
+    def invalidate(self):
+        """Rebuild the index on next lookup."""
+        with self._lock:
+            self._names = self._folded = None
+
+
+unitAliases = UnitAliases()
+
+
+def _normalizeUnitName(name):
+    """Get unit name `name` with '**' written '^', '·' and '×' written '*', ' per ' written '/',
+    no spaces around operators and '*' between names separated by spaces ; 'kg m / s**2' -> 'kg*m/s^2'.
+    """
+    name = name.strip().replace('**', '^').replace('·', '*').replace('×', '*').replace(' per ', '/')
+    name = _unitNameOperators.sub(r'\1', name)
+    return _unitNameSpaces.sub('*', name)
+
+
+_unitNameOperators = re.compile(r'\s*([/*^-])\s*')
+_unitNameSpaces = re.compile(r'\s+')
 
 
 def withoutTypes(expr, types):
@@ -190,10 +983,12 @@ def _keywordError(text):
     return False
 
 
-def _notSafeError(text):
-    res = expr_is_safe(text)
-    if res is not None:
-        raise ExpressionError(f"Invalid use of '.' `{res}`")
+def _notSafeError(text, scan=None):
+    scan = scan or scanExpr(text)
+    if scan.unsafe is not None:
+        if any(t in _stringTokens for t, _ in scan.tokens):
+            raise ExpressionError(f"String literal `{scan.unsafe}` at position {scan.position}")
+        raise ExpressionError(f"Invalid use of '.' `{scan.unsafe}` at position {scan.position}")
     return False
 
 
@@ -203,6 +998,8 @@ def _invalidIdentifierError(text):
     return False
 
 
+@parseCache.cached()
+@_traced('parse')
 def textToSymbol(text):
     """Get sympy.Symbol version of `text` after
         checking for safety, keyword, identifier.
@@ -216,26 +1013,65 @@ def textToSymbol(text):
     return _notSafeError(text) or _keywordError(text) or _invalidIdentifierError(text) or Symbol(text)
 
 
-def parseExpr(text):
-    """Parse a string, checking for errors.
-    Returns sympy.Expr if all is well, None if text=='',
-        otherwise raises sympyentrywidget.ExpressionError
+_globalDict = None
 
-    Notes:
-    Replaces `^` with `**` before processing (ease of exponent usage).
-    Checks if text is relatively safe to evaluate.
 
-    :param text: str
-    :return: sympy.Expr, None, or raises ExpressionError
+# python builtins available to parsed text ; sympy's parse_expr would add every builtin
+# function, eval, exec, open and __import__ among them
+_parseBuiltins = ('abs', 'all', 'any', 'divmod', 'len', 'pow', 'round', 'sorted', 'sum')
+
+
+def _parseGlobals():
+    """The global namespace sympy's parse_expr builds on every call, built once, without
+    python's builtins but _parseBuiltins."""
+    global _globalDict
+    if _globalDict is None:
+        import builtins
+        from sympy import Max, Min
+        globalDict = dict()
+        exec('from sympy import *', globalDict)
+        globalDict.update((k, getattr(builtins, k)) for k in _parseBuiltins)
+        globalDict.update(max=Max, min=Min, __builtins__={})
+        _globalDict = globalDict
+    return _globalDict
+
+
+def _parseText(text, localDict):
+    """Check `text` and parse it with sympy, tokenizing it only once.
+    Same as sympy's parse_expr(text, local_dict=localDict, evaluate=False).
+    Plain arithmetic of numbers and names takes a fast path instead, see _fastParse.
+
+    :param text: str, with `^` already replaced
+    :param localDict: dict
+    :return: sympy.Expr or raises ExpressionError
     """
-    logger.log(logging.DEBUG - 1, f"parseExpr('{text}')")
-    if text == '':
-        return None
-    text = text.replace('^', '**')
-    err = _notSafeError(text) or _keywordError(text)
+    start = _traceStart()
+    expr = _fastParse(text, localDict)
+    if expr is not None:
+        _trace('parse', '_fastParse', start)
+        return expr
+    return _evalTokens(_safeScan(text).tokens, localDict)
+
 
+@_traced('safety')
+def _safeScan(text):
+    """scanExpr, raising ExpressionError if `text` is unsafe, a keyword, or cannot be tokenized."""
+    scan = scanExpr(text)
+    err = _notSafeError(text, scan) or _keywordError(text)
+    if not scan.complete:
+        raise ExpressionError("Syntax error")
+    return scan
+
+
+@_traced('parse')
+def _evalTokens(tokens, localDict):
+    """Evaluate tokens from scanExpr into a sympy.Expr, as sympy's parse_expr does."""
+    globalDict = _parseGlobals()
     try:
-        expr = parse_expr(text, evaluate=False)
+        for transform in standard_transformations:
+            tokens = transform(tokens, localDict, globalDict)
+        code = compile(evaluateFalse(untokenize(tokens)), '<string>', 'eval')
+        expr = eval_expr(code, localDict, globalDict)
         str(expr)  # catch some problems
     except AttributeError as e:
         raise ExpressionError("Unknown function call")
@@ -243,13 +1079,247 @@ def parseExpr(text):
         raise ExpressionError("Syntax error")
     except Exception as e:
         raise ExpressionError((type(e).__name__, repr(e)))
+    finally:
+        # restore names sympy's auto_symbol defined, as parse_expr does
+        for name in localDict.pop('', ()):
+            localDict[name] = ''
 
     if isinstance(expr, Function):
         raise ExpressionError('Function is not a valid expression')
+    if not isinstance(expr, Basic):
+        if not isinstance(expr, (int, float)) or isinstance(expr, bool):
+            raise ExpressionError(f'Not an expression: {type(expr).__name__}')
+        expr = sympify(expr)
 
     return expr
 
 
+_digits = frozenset('0123456789')
+_nameStart = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_')
+_nameChars = _nameStart | _digits
+
+
+def _numberEnd(text, i):
+    """End of the decimal literal starting at `i`, None if it is not one _fastParse takes."""
+    n = len(text)
+    j = i
+    while j < n and text[j] in _digits:
+        j += 1
+    integer = j > i
+    if j < n and text[j] == '.':
+        j += 1
+        k = j
+        while j < n and text[j] in _digits:
+            j += 1
+        if not integer and j == k:
+            return None
+    elif integer and text[i] == '0' and j - i > 1:
+        return None  # leading zeros
+    if j < n and text[j] in 'eE':
+        j += 1
+        if j < n and text[j] in '+-':
+            j += 1
+        k = j
+        while j < n and text[j] in _digits:
+            j += 1
+        if j == k:
+            return None
+    if j < n and (text[j] in _nameChars or text[j] == '.'):
+        return None  # 1j, 1_000, 3mm, 1.2.3
+    return j
+
+
+def _fastTokens(text):
+    """Tokens of `text` for _fastParse, None if it has anything else.
+
+    :return: list of (kind, str) ; kind is 'num', 'name' or 'op'
+    """
+    tokens = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c == ' ':
+            i += 1
+        elif c in '+-/()':
+            tokens.append(('op', c))
+            i += 1
+        elif c == '*':
+            if text.startswith('**', i):
+                tokens.append(('op', '**'))
+                i += 2
+            else:
+                tokens.append(('op', '*'))
+                i += 1
+        elif c in _digits or c == '.':
+            j = _numberEnd(text, i)
+            if j is None:
+                return None
+            tokens.append(('num', text[i:j]))
+            i = j
+        elif c in _nameStart:
+            j = i + 1
+            while j < n and text[j] in _nameChars:
+                j += 1
+            if j < n and ord(text[j]) > 127:
+                return None  # unicode identifier
+            tokens.append(('name', text[i:j]))
+            i = j
+        else:
+            return None
+    return tokens
+
+
+class _FastParser():
+    """Recursive descent parser for numbers, names, + - * / ** and parentheses, in python's grammar.
+
+    Builds the nodes of sympy's evaluateFalse transformation of the same text:
+    ('Add', args), ('Mul', args), ('Pow', (base, exp)), ('neg', x), ('pos', x), ('atom', obj)
+    """
+    def __init__(self, tokens, localDict):
+        self.tokens = tokens
+        self.localDict = localDict
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+    def parse(self):
+        node = self.expr()
+        if self.i != len(self.tokens):
+            raise SyntaxError
+        return node
+
+    def expr(self):
+        left = self.term()
+        while True:
+            kind, op = self.peek()
+            if op not in ('+', '-') or kind != 'op':
+                return left
+            self.i += 1
+            right = self.term()
+            if op == '-':
+                right = ('Mul', (('atom', -1), right))
+            left = ('Add', _flatten((left, right), 'Add'))
+
+    def term(self):
+        left = self.factor()
+        while True:
+            kind, op = self.peek()
+            if op not in ('*', '/') or kind != 'op':
+                return left
+            self.i += 1
+            right = self.factor()
+            if op == '/':
+                right = ('Pow', (right, ('atom', -1)))
+            left = ('Mul', _flatten((left, right), 'Mul'))
+
+    def factor(self):
+        kind, op = self.peek()
+        if kind == 'op' and op in ('+', '-'):
+            self.i += 1
+            return ('pos' if op == '+' else 'neg', self.factor())
+        return self.power()
+
+    def power(self):
+        base = self.atom()
+        kind, op = self.peek()
+        if kind == 'op' and op == '**':
+            self.i += 1
+            return ('Pow', (base, self.factor()))
+        return base
+
+    def atom(self):
+        kind, value = self.peek()
+        self.i += 1
+        if kind == 'num':
+            return ('atom', Float(value) if '.' in value or 'e' in value or 'E' in value else Integer(value))
+        elif kind == 'name':
+            return ('atom', self.name(value))
+        elif value == '(':
+            node = self.expr()
+            if self.peek() != ('op', ')'):
+                raise SyntaxError
+            self.i += 1
+            return node
+        raise SyntaxError
+
+    def name(self, name):
+        # as sympy's auto_symbol: names of `localDict`, else Symbols unless sympy or python defines them
+        if iskeyword(name) or name in ('True', 'False', 'None'):
+            raise SyntaxError
+        try:
+            value = self.localDict[name]
+        except KeyError:
+            if name in _parseGlobals():
+                raise SyntaxError
+            return Symbol(name)
+        return Symbol(name) if value == '' else value
+
+
+def _flatten(args, func):
+    """Splice args of `func` nodes, as sympy's EvaluateFalseTransformer.flatten."""
+    rv = []
+    for arg in args:
+        if arg[0] == func:
+            rv.extend(_flatten(arg[1], func))
+        else:
+            rv.append(arg)
+    return tuple(rv)
+
+
+def _build(node):
+    kind, value = node
+    if kind == 'atom':
+        return value
+    elif kind == 'Add':
+        return Add(*(_build(a) for a in value), evaluate=False)
+    elif kind == 'Mul':
+        return Mul(*(_build(a) for a in value), evaluate=False)
+    elif kind == 'Pow':
+        return Pow(_build(value[0]), _build(value[1]), evaluate=False)
+    elif kind == 'neg':
+        return -_build(value)
+    return +_build(value)
+
+
+def _fastParse(text, localDict):
+    """Parse arithmetic of numbers and names without sympy's parser, to the same
+    expression as _evalTokens would give. See _FastParser.
+
+    :param text: str, with `^` already replaced
+    :param localDict: dict, as for _parseText
+    :return: sympy.Expr, or None when `text` needs the full parser (including any error)
+    """
+    tokens = _fastTokens(text)
+    if not tokens:
+        return None
+    try:
+        return _build(_FastParser(tokens, localDict).parse())
+    except Exception:  # anything else is reported by the full parser
+        return None
+
+
+@parseCache.cached(normalize=_normalizeExprText)
+def parseExpr(text):
+    """Parse a string, checking for errors.
+    Returns sympy.Expr if all is well, None if text=='',
+        otherwise raises sympyentrywidget.ExpressionError
+
+    Notes:
+    Replaces `^` with `**` before processing (ease of exponent usage).
+    Checks if text is relatively safe to evaluate.
+
+    :param text: str
+    :return: sympy.Expr, None, or raises ExpressionError
+    """
+    logger.log(logging.DEBUG - 1, "parseExpr('%s')", text)
+    if text == '':
+        return None
+    text = text.replace('^', '**')
+    return _parseText(text, dict())
+
+
+@_traced('dimension')
 def getDimension(expr):
     """Get the units.Dimension expression of `expr`.
     If the dimension cannot be determined, returns None.
@@ -257,174 +1327,1250 @@ def getDimension(expr):
     :param expr: sympy.Expr
     :return: units.Dimension or None
     """
-    logger.log(logging.DEBUG-1, f'getDimension({expr})')
+    logger.log(logging.DEBUG-1, 'getDimension(%s)', expr)
     if expr is not None:
         try:
             result = units.systems.SI._collect_factor_and_dimension(expr)[1]
         except ValueError as e:
-            logger.log(logging.DEBUG-1, f'getDimension() -> {repr(e)}')
+            logger.log(logging.DEBUG-1, 'getDimension() -> %r', e)
             result = None
         except AttributeError as e:
-            logger.log(logging.DEBUG-1, f'getDimension() -> {repr(e)}')
+            logger.log(logging.DEBUG-1, 'getDimension() -> %r', e)
             ev = quantity_simplify(expr).evalf()
             result = units.systems.SI._collect_factor_and_dimension(ev)[1]
     else:
         result = None
-    logger.log(logging.DEBUG-1, f'getDimension({expr}) -> {result}')
+    logger.log(logging.DEBUG-1, 'getDimension(%s) -> %s', expr, result)
     return result
 
 
-def convertTo(expr, unit):
+# base dimensions indexed by dimension vectors, see dimensionVector
+baseDimensions = tuple(units.Dimension(d.name) for d in units.systems.SI.get_dimension_system().base_dims) + \
+                 (units.Dimension('information'),)
+dimensionless = (0,) * len(baseDimensions)
+_baseDimensionIndex = {d.name: i for i, d in enumerate(baseDimensions)}
+_dimensionVectors = dict()  # {units.Quantity or units.Dimension: vector}
+
+
+def _exponent(e):
+    """int or Fraction of a sympy.Rational\\int\\Fraction exponent."""
+    e = Fraction(int(e.p), int(e.q)) if hasattr(e, 'p') else Fraction(e)
+    return e.numerator if e.denominator == 1 else e
+
+
+def _symbolicExponent(e):
+    """_exponent of a rational sympy exponent, the sympy expression otherwise (eg. `x` of mm**x)."""
+    return _exponent(e) if e.is_Rational else e
+
+
+def _vectorOfDimension(dim):
+    try:
+        return _dimensionVectors[dim]
+    except KeyError:
+        pass
+    try:
+        deps = units.systems.SI.get_dimension_system().get_dimensional_dependencies(dim)
+    except (TypeError, ValueError) as e:
+        raise UnitMisMatchError(repr(e))
+    vector = [0] * len(baseDimensions)
+    for d, e in deps.items():
+        i = _baseDimensionIndex.get(d.name)
+        if i is None or not sympify(e).is_Rational:
+            raise UnitMisMatchError(f"Unsupported dimension {dim}")
+        vector[i] = _exponent(e)
+    vector = _dimensionVectors[dim] = tuple(vector)
+    return vector
+
+
+def _dimensionVector(expr):
+    """dimensionVector, raising UnitMisMatchError when the dimension cannot be determined."""
+    if isinstance(expr, units.Quantity):
+        try:
+            return _dimensionVectors[expr]
+        except KeyError:
+            vector = _dimensionVectors[expr] = \
+                _vectorOfDimension(units.systems.SI.get_quantity_dimension(expr))
+            return vector
+    elif isinstance(expr, units.Dimension):
+        return _vectorOfDimension(expr)
+    elif isinstance(expr, Mul):
+        vector = dimensionless
+        for arg in expr.args:
+            v = _dimensionVector(arg)
+            if v is not dimensionless:
+                vector = tuple(a + b for a, b in zip(vector, v))
+        if any(isinstance(a, Basic) for a in vector):  # symbolic exponents may cancel
+            vector = tuple(_symbolicExponent(a) if isinstance(a, Basic) else a for a in vector)
+        return vector
+    elif isinstance(expr, Pow):
+        vector = _dimensionVector(expr.base)
+        if _dimensionVector(expr.exp) != dimensionless:
+            raise UnitMisMatchError(f'Exponent "{expr.exp}" is not dimensionless')
+        if vector == dimensionless:
+            return dimensionless
+        e = expr.exp if expr.exp.is_Rational else expr.exp.doit()  # eg. unevaluated 1/2
+        if e.is_Float:
+            e = Rational(str(e))  # mm**0.5 as mm**(1/2)
+        if not e.is_Rational:  # eg. mm**x, compatible with mm**x only
+            return tuple(_symbolicExponent(a * e) for a in vector)
+        e = _exponent(e)
+        return tuple(_exponent(a * e) for a in vector)
+    elif isinstance(expr, Add):
+        vector = _dimensionVector(expr.args[0])
+        for addend in expr.args[1:]:
+            v = _dimensionVector(addend)
+            if v != vector:
+                raise UnitMisMatchError(f'Dimension of "{addend}" is {vectorDimension(v)}, '
+                                        f'but it should be {vectorDimension(vector)}')
+        return vector
+    elif getattr(expr, 'is_Function', False):
+        # same as sympy's unit systems, a function takes the dimension of its first argument
+        return _dimensionVector(expr.args[0]) if expr.args else dimensionless
+    elif not isinstance(expr, (Basic, int, float, Fraction)):
+        raise UnitMisMatchError(f"Dimension of {type(expr).__name__} could not be determined")
+    return dimensionless
+
+
+def dimensionVector(expr):
+    """Get the dimension of `expr` as a tuple of exponents of `baseDimensions`: int or Fraction,
+    or sympy.Expr for symbolic exponents (eg. mm**x). Float exponents are taken as decimal fractions.
+    Dimensions are equal when their vectors are equal ; `dimensionless` is all zeros.
+    Known units.Quantity vectors are cached, so this is one walk of `expr`.
+    If the dimension cannot be determined (eg. addends with different dimensions), returns None.
+
+    :param expr: sympy.Expr\\units.Quantity\\units.Dimension
+    :return: tuple or None
+    """
+    if expr is None:
+        return None
+    try:
+        return _dimensionVector(expr)
+    except UnitMisMatchError:
+        return None
+
+
+def vectorDimension(vector):
+    """Get the units.Dimension of a dimension vector (see dimensionVector).
+
+    :param vector: tuple
+    :return: units.Dimension
+    """
+    return units.Dimension(Mul(*[d.name ** S(e) for d, e in zip(baseDimensions, vector) if e != 0]))
+
+
+@_traced('convert')
+def convertTo(expr, unit, numeric='exact'):
     """Wraps units.convert_to for extra functionality.
 
-    Extra features:
-        Allows `unit` to be a string.
-        If `expr` has no units, returns `expr * unit`.
+    Extra features:
+        Allows `unit` to be a string.
+        If `expr` has no units, returns `expr * unit`.
+        Evaluates the result in a numeric mode, see evaluateNumeric.
+
+    :param expr: sympy.Expr
+    :param unit: str\\units.Quantity\\units.Dimension
+    :param numeric: 'exact', 'float64' or int, digits of precision
+    :return: sympy.Expr, QuantityValue ('float64') or None
+    """
+    logger.log(logging.DEBUG-1, 'convertTo(%s, %s)', expr, unit)
+    if expr is None:
+        return None
+    if numeric != 'exact':
+        return evaluateNumeric(expr, numeric, unit)
+
+    u = _resolveUnit(unit)
+
+    logger.log(logging.DEBUG-1, 'convertTo() expr %s, u %s', expr, u)
+    dim = dimensionVector(expr)
+    logger.log(logging.DEBUG - 1, 'convertTo() dim = %s', dim)
+    if dim == dimensionless:
+        _ret = expr * u
+    else:
+        try:
+            _ret = _convertTerms(expr, u)
+        except UnitMisMatchError:  # not one unit per term, let sympy sort it out
+            _ret = units.convert_to(expr, u)
+
+    logger.log(logging.DEBUG-1, 'convertTo() -> %s', _ret)
+    return _ret
+
+
+def _resolveUnit(unit):
+    """Get a unit expression from `unit`, looking str up in unitAliases before parsing.
+
+    :param unit: str\\units.Quantity\\sympy.Expr
+    :return: sympy.Expr
+    """
+    if not isinstance(unit, str):
+        return sympify(unit)
+    found = unitAliases.lookup(unit)
+    if found is not None:
+        return found
+    return parseUnits(unit)
+
+
+def _scaleFactor(expr):
+    """Get the exact scale factor of unit expression `expr` relative to the SI unit system.
+
+    :param expr: sympy.Expr
+    :return: sympy.Expr, a number
+    """
+    if isinstance(expr, units.Quantity):
+        return units.systems.SI.get_quantity_scale_factor(expr)
+    elif isinstance(expr, Mul):
+        factor = S.One
+        for arg in expr.args:
+            factor *= _scaleFactor(arg)
+        return factor
+    elif isinstance(expr, Pow):
+        return _scaleFactor(expr.base) ** expr.exp.doit()
+    elif isinstance(expr, Basic) and expr.is_number:
+        return expr
+    raise UnitMisMatchError(f"'{expr}' is not a unit")
+
+
+def conversionFactor(fromUnit, toUnit):
+    """Get the factor converting magnitudes in `fromUnit` to magnitudes in `toUnit`.
+
+    :param fromUnit: str\\units.Quantity\\sympy.Expr
+    :param toUnit: str\\units.Quantity\\sympy.Expr
+    :return: sympy.Expr, an exact number
+    """
+    return _conversionFactor(_resolveUnit(fromUnit), _resolveUnit(toUnit)).exact
+
+
+_Factor = namedtuple('_Factor', 'exact float')
+_conversionFactors = OrderedDict()  # {(from units, to units): _Factor or UnitMisMatchError}, least recently used first
+_conversionFactorsSize = 4096
+_conversionFactorsLock = threading.Lock()  # workers of async widgets convert too
+
+
+def _conversionFactor(fromUnit, toUnit):
+    """conversionFactor of unit expressions, derived once per pair ; the latest
+    _conversionFactorsSize pairs are kept.
+
+    :return: _Factor or raises UnitMisMatchError
+    """
+    key = (fromUnit, toUnit)
+    with _conversionFactorsLock:
+        rv = _conversionFactors.get(key)
+        if rv is not None:
+            _conversionFactors.move_to_end(key)
+    if rv is None:
+        try:
+            fromDim, toDim = _dimensionVector(fromUnit), _dimensionVector(toUnit)
+            if fromDim != toDim:
+                raise UnitMisMatchError(f"{vectorDimension(fromDim)} incompatible with {vectorDimension(toDim)}")
+            exact = _scaleFactor(fromUnit) / _scaleFactor(toUnit)
+            rv = _Factor(exact, float(exact))
+        except UnitMisMatchError as e:
+            rv = copy.copy(e).with_traceback(None)
+        with _conversionFactorsLock:
+            _conversionFactors[key] = rv
+            while len(_conversionFactors) > _conversionFactorsSize:
+                _conversionFactors.popitem(last=False)
+    if isinstance(rv, UnitMisMatchError):
+        raise copy.copy(rv)
+    return rv
+
+
+def _splitTerm(term):
+    """Split product `term` into (magnitude, unit): its factors without and with units.
+
+    :param term: sympy.Expr
+    :return: (sympy.Expr, sympy.Expr) ; unit is 1 without units
+    """
+    magnitude, termUnits = [], []
+    for arg in Mul.make_args(term):
+        if isinstance(arg, units.Quantity) or (isinstance(arg, Pow) and isinstance(arg.base, units.Quantity)):
+            termUnits.append(arg)
+        else:
+            magnitude.append(arg)
+    return Mul(*magnitude), Mul(*termUnits)
+
+
+def _convertTerms(expr, unit):
+    """Convert each term of `expr` to `unit` with its cached conversion factor.
+    Raises UnitMisMatchError if a term has no units, or units not convertible to `unit`.
+
+    :param expr: sympy.Expr
+    :param unit: sympy.Expr
+    :return: sympy.Expr
+    """
+    if isinstance(expr, Add):
+        return Add(*[_convertTerms(arg, unit) for arg in expr.args])
+    magnitude, termUnit = _splitTerm(expr)
+    if termUnit is S.One:
+        raise UnitMisMatchError(f"'{expr}' has no units")
+    return magnitude * _conversionFactor(termUnit, unit).exact * unit
+
+
+def convertArray(values, fromUnit, toUnit, exact=False):
+    """Convert an array of magnitudes in `fromUnit` to magnitudes in `toUnit`.
+
+    Units are resolved and checked once per call, then applied to every value in one operation.
+    Requires numpy.
+
+    :param values: array-like of numbers
+    :param fromUnit: str\\units.Quantity\\sympy.Expr
+    :param toUnit: str\\units.Quantity\\sympy.Expr
+    :param exact: bool, True to get an object array of exact values (Fraction when the factor is rational)
+    :return: numpy.ndarray, float64 or object
+    """
+    import numpy
+
+    factor = _conversionFactor(_resolveUnit(fromUnit), _resolveUnit(toUnit))
+    logger.log(logging.DEBUG-1, 'convertArray() factor %s', factor.exact)
+    if not exact:
+        return numpy.asarray(values, dtype=numpy.float64) * factor.float
+
+    values = numpy.asarray(values, dtype=object)
+    factor = factor.exact
+    if factor.is_Rational:
+        factor = Fraction(int(factor.p), int(factor.q))
+        convert = lambda v: Fraction(v) * factor
+    else:
+        convert = lambda v: sympify(v) * factor
+    return numpy.asarray(numpy.frompyfunc(convert, 1, 1)(values), dtype=object)
+
+
+def _splitQuantity(expr):
+    """Split `expr` into (magnitude, unit), the product of its factors without and with units.
+    A sum is converted to the units of its first term first.
+
+    :param expr: sympy.Expr
+    :return: (sympy.Expr, sympy.Expr) ; unit is 1 without units
+    """
+    if isinstance(expr, Add) and expr.has(units.Quantity):
+        expr = convertTo(expr, _splitQuantity(expr.args[0])[1])
+    magnitude, unit = _splitTerm(expr)
+    if magnitude.has(units.Quantity):  # unevaluated products
+        return _splitQuantity(expr.doit())
+    return magnitude, unit
+
+
+def _number(magnitude, exact=False):
+    """Python number of a sympy magnitude: Fraction when `exact` and rational, else float.
+    Raises ValueError if it is not a real number.
+    """
+    if not magnitude.is_Rational:
+        magnitude = magnitude.doit()
+    if magnitude.is_Rational:
+        return Fraction(int(magnitude.p), int(magnitude.q)) if exact else float(magnitude)
+    if magnitude.is_number:
+        try:
+            return float(magnitude)
+        except TypeError:  # complex
+            pass
+    raise ValueError(f"'{magnitude}' is not a real number")
+
+
+_unitKeys = dict()  # {unit expression: key}
+_unitExprs = {'1': S.One}  # {key: unit expression}
+
+
+def _unitKey(unit):
+    """Short str naming unit expression `unit` with unit abbreviations, eg. 'mm', 'kg*m/s**2' ; see QuantityValue."""
+    try:
+        return _unitKeys[unit]
+    except KeyError:
+        pass
+    names = dict()
+    for q in unit.atoms(units.Quantity):
+        abbrev = str(q.abbrev)
+        try:
+            names[q] = Symbol(abbrev if unitSubs[abbrev] == q else str(q))
+        except KeyError:
+            names[q] = Symbol(str(q))
+    key = str(unit.xreplace(names))
+    _unitKeys[unit] = key
+    _unitExprs.setdefault(key, unit)
+    return key
+
+
+def _unitExpr(key):
+    try:
+        return _unitExprs[key]
+    except KeyError:
+        unit = _unitExprs[key] = _resolveUnit(key)
+        return unit
+
+
+class QuantityValue():
+    """Lightweight number with units, for applications keeping many values around.
+
+    :param magnitude: float or Fraction (any python number works)
+    :param unit: str key of the units (eg. 'mm', 'kg*m/s**2', '1' for none, see convertTo),
+                 or a unit expression
+    :param dimension: dimension vector of `unit`, computed when None (see dimensionVector)
+
+    Arithmetic with numbers and other QuantityValues stays in python numbers ; sums and
+    comparisons convert the other value to this one's units (UnitMisMatchError when incompatible),
+    products and quotients combine units. The sympy expression is built on demand by `expr`.
+    """
+    __slots__ = ('magnitude', 'unit', 'dimension', '_expr')
+
+    def __init__(self, magnitude, unit='1', dimension=None):
+        if not isinstance(unit, str):
+            unit = _unitKey(sympify(unit))
+        self.magnitude = magnitude
+        self.unit = unit
+        self.dimension = dimensionVector(_unitExpr(unit)) if dimension is None else dimension
+        self._expr = None
+
+    @classmethod
+    def fromExpr(cls, expr, unit=None, exact=False):
+        """Get the QuantityValue of `expr`, in `unit` or in the units of `expr`.
+        Raises ValueError if its magnitude is not a real number (eg. has free symbols).
+
+        :param expr: sympy.Expr
+        :param unit: str\\units.Quantity\\sympy.Expr
+        :param exact: bool, keep rational magnitudes as Fraction instead of float
+        :return: QuantityValue
+        """
+        if unit is not None:
+            target = _resolveUnit(unit)
+            magnitude, unit = _splitQuantity(convertTo(expr, target))
+            if unit != target:
+                magnitude, unit = magnitude * _conversionFactor(unit, target).exact, target
+        else:
+            magnitude, unit = _splitQuantity(expr)
+        return cls(_number(magnitude, exact), _unitKey(unit))
+
+    @property
+    def unitExpr(self):
+        """sympy.Expr of the units."""
+        return _unitExpr(self.unit)
+
+    @property
+    def expr(self):
+        """sympy.Expr of the value, built on first use."""
+        if self._expr is None:
+            self._expr = sympify(self.magnitude) * self.unitExpr
+        return self._expr
+
+    def to(self, unit):
+        """Convert to `unit`.
+
+        :param unit: str\\units.Quantity\\sympy.Expr
+        :return: QuantityValue or raises UnitMisMatchError
+        """
+        key = unit if isinstance(unit, str) else _unitKey(sympify(unit))
+        if key == self.unit:
+            return self
+        factor = _conversionFactor(self.unitExpr, _unitExpr(key))
+        if isinstance(self.magnitude, Fraction) and factor.exact.is_Rational:
+            magnitude = self.magnitude * Fraction(int(factor.exact.p), int(factor.exact.q))
+        else:
+            magnitude = self.magnitude * factor.float
+        return QuantityValue(magnitude, key, self.dimension)
+
+    def _other(self, other):
+        """`other` as a magnitude in self.unit."""
+        if isinstance(other, QuantityValue):
+            return other.to(self.unit).magnitude
+        if self.dimension != dimensionless:
+            if other != 0:
+                raise UnitMisMatchError(f"Number {other} incompatible with {vectorDimension(self.dimension)}")
+            return other
+        return QuantityValue(other, '1', self.dimension).to(self.unit).magnitude  # eg. 1 == 25.4 mm/inch
+
+    def _combine(self, other, sign):
+        """(unit key, dimension) of self * other**sign."""
+        unit = _unitKey(self.unitExpr * other.unitExpr ** sign)
+        return unit, tuple(a + sign * b for a, b in zip(self.dimension, other.dimension))
+
+    def __add__(self, other):
+        return QuantityValue(self.magnitude + self._other(other), self.unit, self.dimension)
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return QuantityValue(self.magnitude - self._other(other), self.unit, self.dimension)
+
+    def __rsub__(self, other):
+        return QuantityValue(self._other(other) - self.magnitude, self.unit, self.dimension)
+
+    def __mul__(self, other):
+        if isinstance(other, QuantityValue):
+            return QuantityValue(self.magnitude * other.magnitude, *self._combine(other, 1))
+        return QuantityValue(self.magnitude * other, self.unit, self.dimension)
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, QuantityValue):
+            return QuantityValue(self.magnitude / other.magnitude, *self._combine(other, -1))
+        return QuantityValue(self.magnitude / other, self.unit, self.dimension)
+
+    def __rtruediv__(self, other):
+        unit = _unitKey(1 / self.unitExpr)
+        return QuantityValue(other / self.magnitude, unit, tuple(-a for a in self.dimension))
+
+    def __neg__(self):
+        return QuantityValue(-self.magnitude, self.unit, self.dimension)
+
+    def __abs__(self):
+        return QuantityValue(abs(self.magnitude), self.unit, self.dimension)
+
+    def __float__(self):
+        return float(self.magnitude)
+
+    def __eq__(self, other):
+        if not isinstance(other, (QuantityValue, Number)):
+            return NotImplemented
+        try:
+            return self.magnitude == self._other(other)
+        except UnitMisMatchError:
+            return False
+
+    def __lt__(self, other):
+        return self.magnitude < self._other(other)
+
+    def __le__(self, other):
+        return self.magnitude <= self._other(other)
+
+    def __gt__(self, other):
+        return self.magnitude > self._other(other)
+
+    def __ge__(self, other):
+        return self.magnitude >= self._other(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'QuantityValue({self.magnitude!r}, {self.unit!r})'
+
+    def __str__(self):
+        return f'{self.magnitude} {self.unit}' if self.unit != '1' else str(self.magnitude)
+
+    def __reduce__(self):
+        return QuantityValue, (self.magnitude, self.unit, self.dimension)
+
+
+numericModes = ('exact', 'float64')  # numeric modes besides an int, the digits of mpmath precision
+
+
+def _checkNumeric(numeric):
+    """Raise ValueError if `numeric` is not a numeric mode, see evaluateNumeric."""
+    if numeric in numericModes:
+        return numeric
+    if isinstance(numeric, int) and not isinstance(numeric, bool) and numeric > 0:
+        return numeric
+    raise ValueError(f"Numeric mode must be 'exact', 'float64' or digits of precision, not {numeric!r}")
+
+
+def _floatValue(expr, unit=None):
+    """Value of `expr` in float64: each term's magnitude as a python float, times its cached
+    float conversion factor to `unit` (default: units of the first term).
+    Returns None if a magnitude is not a real number or terms do not convert.
+
+    :return: float if there are no units, QuantityValue, or None
+    """
+    terms = [_splitTerm(term) for term in Add.make_args(expr)]
+    if unit is None:
+        unit = key = terms[0][1]
+    else:
+        key = unit
+        if _dimensionVector(terms[0][1]) == dimensionless:  # numbers are taken in `unit`, as by convertTo
+            unit = S.One
+    total = 0.
+    try:
+        for magnitude, termUnit in terms:
+            m = float(magnitude)
+            if termUnit != unit:
+                m *= _conversionFactor(termUnit, unit).float
+            total += m
+    except (TypeError, UnitMisMatchError):  # free symbols, complex, unevaluated units
+        return None
+    if key is S.One:
+        return total
+    return QuantityValue(total, _unitKey(key))
+
+
+def evaluateNumeric(expr, numeric=15, unit=None):
+    """Evaluate `expr` in numeric mode `numeric`, converted to `unit` if given.
+
+    Modes:
+        'exact': the sympy expression, rationals kept exact
+        int N: sympy's evalf with N digits of (mpmath) precision ; 15 is the widgets' default
+        'float64': magnitudes and conversion factors computed as python floats ;
+                   float without units, QuantityValue with units,
+                   or evalf's result if the magnitude is not a real number (eg. free symbols)
+
+    :param expr: sympy.Expr
+    :param numeric: 'exact', 'float64' or int
+    :param unit: str\\units.Quantity\\sympy.Expr, see convertTo
+    :return: sympy.Expr, float, QuantityValue or None if `expr` is None
+    """
+    _checkNumeric(numeric)
+    if expr is None:
+        return None
+    if numeric == 'float64':
+        value = _floatValue(expr, None if unit is None else _resolveUnit(unit))
+        if value is not None:
+            return value
+        numeric = 15
+    if unit is not None:
+        expr = convertTo(expr, unit)
+    if numeric == 'exact':
+        return expr
+    return expr.evalf(numeric)
+
+
+def _displayValue(value):
+    """Short str of an evaluated value for display, 4 significant digits."""
+    if isinstance(value, QuantityValue):
+        return f'{value.magnitude:.4g}' if value.unit == '1' else f'{value.magnitude:.4g}*{value.unitExpr}'
+    if isinstance(value, float):
+        return f'{value:.4g}'
+    return str(value.evalf(4))
+
+
+def _baseUnits(vector):
+    """Get the product of SI base units with dimension `vector`.
+
+    :param vector: tuple, see dimensionVector
+    :return: sympy.Expr
+    """
+    rv = S.One
+    for unit in _siBaseUnits:
+        rv *= unit ** vector[_dimensionVector(unit).index(1)]
+    return rv
+
+
+# one unit per base dimension, see _baseUnits
+_siBaseUnits = (units.meter, units.kilogram, units.second, units.ampere, units.mol, units.candela, units.kelvin,
+                units.bit)
+
+
+def compileExpr(expr, unit=None, symbols=None):
+    """Compile `expr` into a numpy-vectorized callable taking its free symbols as arguments.
+    Units are folded into one scale factor, so the callable returns magnitudes in `unit`.
+    Common subexpressions are evaluated once per call. Requires numpy.
+
+    If `expr` has no units, its magnitude is taken to be in `unit` already (see convertTo).
+
+    :param expr: str\\sympy.Expr
+    :param unit: str\\units.Quantity\\sympy.Expr, output units ; default is SI base units
+    :param symbols: iterable of Symbols, the callable's arguments ; default is free symbols sorted by name
+    :return: function, with attribute `symbols` ; None if `expr` is None
+    """
+    import numpy  # noqa: F401, lambdify needs numpy installed
+    from sympy import lambdify
+
+    if isinstance(expr, str):
+        expr = parseUnits(expr)
+    if expr is None:
+        return None
+
+    dim = _dimensionVector(expr)
+    magnitude = expr.xreplace({q: _scaleFactor(q) for q in expr.atoms(units.Quantity)})
+    if dim != dimensionless:
+        if unit is None:
+            unit = _baseUnits(dim)
+        else:
+            unit = _resolveUnit(unit)
+            unitDim = _dimensionVector(unit)
+            if dim != unitDim:
+                raise UnitMisMatchError(f"{vectorDimension(dim)} incompatible with {vectorDimension(unitDim)}")
+        magnitude = magnitude / _scaleFactor(unit)
+
+    if symbols is None:
+        symbols = sorted(expr.free_symbols, key=str)
+    symbols = tuple(symbols)
+    logger.log(logging.DEBUG-1, 'compileExpr() %s -> %s', symbols, magnitude)
+    func = lambdify(symbols, magnitude, modules='numpy', cse=True)
+    func.symbols = symbols
+    return func
+
+
+@parseCache.cached(normalize=_normalizeExprText)
+def parseUnits(text, dimension=None):
+    """Parse a string with units possibly included.
+    See parseExpr for pre-processing steps.
+
+    Raises ExpressionError same as parseExpr.
+    Raises UnitMisMatchError if the expression has incompatible units.
+
+    :param text: str
+    :return: sympy.Expr or None
+    """
+    logger.log(logging.DEBUG - 1, 'parseUnits(%s)', text)
+
+    if text == '':
+        return None
+    text = text.replace('^', '**')
+    expr = _parseText(text, unitSubs)
+
+    start = _traceStart()
+    try:
+        expr = quantity_simplify(expr)
+    except TypeError:
+        pass
+    except Exception as e:  # callers only see ExpressionError and UnitMisMatchError
+        raise ExpressionError((type(e).__name__, repr(e)))
+    _trace('simplify', 'parseUnits', start)
+
+    try:
+        unitsAreConsistent(expr, dimension)
+    except UnitMisMatchError as e:
+        raise e
+    return expr
+
+
+@_traced('dimension')
+def unitsAreConsistent(expr, targetUnits=None):
+    """Check if an expression's units are compatible.
+    If `targetUnits` provided, also checks for compatibility for
+    converting to `targetUnits`.
+
+    Raises UnitMisMatchError when applicable.
+
+    Notes:
+    If `targetUnits` is a units.Dimension, requires `expr` to
+        evaluate to units with same units.Dimension (eg. must include units in `expr`)
+    If `expr` has dimension of `1` (unit-less), returns `True`
+        barring other errors or targetUnits being units.Dimension.
+
+    Dimensions are compared as dimension vectors (see dimensionVector).
+
+    :param expr: sympy.Expr
+    :param targetUnits: str\\units.Quantity\\units.Dimension\\dimension vector (treated as units.Dimension)
+    :return: True or raises UnitMisMatchError
+    """
+    logger.log(logging.DEBUG - 1, 'unitsAreConsistent(%s, %s)', expr, targetUnits)
+
+    # raises when addends are inconsistent
+    expr_dim = _dimensionVector(expr)
+    logger.log(logging.DEBUG-1, "expr_dim = %s", expr_dim)
+
+    if targetUnits is None:
+        return True
+
+    # get dimensions of target units
+    if isinstance(targetUnits, str):
+        targetUnits = _resolveUnit(targetUnits)
+
+    if isinstance(targetUnits, tuple):
+        target_dim, strict = targetUnits, True
+    else:
+        target_dim, strict = _dimensionVector(targetUnits), isinstance(targetUnits, units.Dimension)
+    logger.log(logging.DEBUG-1, "target_dim = %s", target_dim)
+
+    if strict:
+        if target_dim == expr_dim:
+            return True
+        else:
+            raise UnitMisMatchError(f"{vectorDimension(expr_dim)} is not specified {vectorDimension(target_dim)}")
+
+    # compare dimensions
+    if expr_dim == dimensionless or expr_dim == target_dim:
+        return True
+    else:
+        raise UnitMisMatchError(f"{vectorDimension(expr_dim)} incompatible with {vectorDimension(target_dim)}")
+
+
+def _parseDimension(dim):
+    """Get a units.Dimension from str `dim` (eg. 'length/time^2'), other types are returned as is.
+    Unsafe text is returned as is too.
+
+    :param dim: str\\units.Dimension
+    :return: units.Dimension
+    """
+    if isinstance(dim, str) and not _notSafeError(dim):
+        new_dim = parse_expr(dim.replace('^', '**'), local_dict=_storage.dimensions)
+        if not isinstance(new_dim, units.Dimension):
+            raise TypeError(f"Cannot create Dimension from '{dim}'")
+        dim = new_dim
+    return dim
+
+
+class _BoundedCalls():
+    """Runs calls in a python subprocess, so a call out of time can be stopped (see _runUntil) ;
+    threads cannot be interrupted safely. The subprocess imports this module once and serves
+    calls in turn. It is killed when a call runs out of time, and a new one is started.
+    """
+    _code = """import pickle, sys
+stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+sys.stdout = sys.stderr
+path, module = pickle.load(stdin)
+sys.path[:0] = path
+__import__(module)
+pickle.dump(True, stdout)
+stdout.flush()
+while True:
+    try:
+        func, args = pickle.load(stdin)
+    except EOFError:
+        break
+    try:
+        reply = True, func(*args)
+    except Exception as e:
+        reply = False, e
+    pickle.dump(reply, stdout)
+    stdout.flush()
+"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process = None
+        self._replies = None
+        self._ready = False
+
+    def _start(self):
+        process = subprocess.Popen([sys.executable, '-c', self._code], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        pickle.dump((list(sys.path), 'sympyentrywidget' if __name__ == '__main__' else __name__), process.stdin)
+        process.stdin.flush()
+        self._replies = queue.Queue()
+        threading.Thread(target=self._read, args=(process.stdout, self._replies),
+                         name='sympyentrywidget-bounded', daemon=True).start()
+        self._process, self._ready = process, False
+
+    @staticmethod
+    def _read(stream, replies):
+        while True:
+            try:
+                replies.put(pickle.load(stream))
+            except Exception:  # EOFError once the subprocess is stopped
+                replies.put(None)
+                return
+
+    def _restart(self):
+        self._process.kill()
+        self._process.wait()
+        self._start()  # imports while the widgets go on
+
+    def warm(self):
+        """Start the subprocess now, if needed, so the first call does not wait for its imports."""
+        with self._lock:
+            if self._process is None:
+                self._start()
+
+    def call(self, func, args, seconds):
+        """Waiting for the subprocess to start counts in `seconds`.
+
+        :return: (True, result) or (False, None) if out of time ; raises the exception of `func`
+        """
+        deadline = time.perf_counter() + seconds
+        with self._lock:
+            if self._process is None:
+                self._start()
+            if not self._ready:
+                try:
+                    ready = self._replies.get(timeout=seconds)
+                except queue.Empty:
+                    return False, None  # still importing
+                if ready is None:
+                    logger.warning('bounded calls subprocess failed to start')
+                    self._process = None
+                    return False, None
+                self._ready = True
+            try:
+                pickle.dump((func, args), self._process.stdin)
+                self._process.stdin.flush()
+                reply = self._replies.get(timeout=max(deadline - time.perf_counter(), 0.))
+            except (OSError, queue.Empty):  # died, or out of time
+                reply = None
+            if reply is None:
+                self._restart()
+                return False, None
+        done, result = reply
+        if not done:
+            raise result
+        return True, result
+
+
+_boundedCalls = _BoundedCalls()
+
+
+def _runUntil(func, args, seconds=None):
+    """Run `func(*args)` ; with a time limit, in a subprocess stopped after `seconds`, see _BoundedCalls.
+
+    :param func: picklable function, as its arguments and result
+    :param seconds: float or None for no limit
+    :return: (True, result) or (False, None) if out of time
+    """
+    if seconds is None:
+        return True, func(*args)
+    if seconds <= 0:
+        return False, None
+    return _boundedCalls.call(func, args, seconds)
+
+
+def _simplified(expr):
+    try:
+        return expr.simplify()
+    except TypeError:
+        return expr
+
+
+def _canonical(expr):
+    """Cheap canonicalization, used when simplify runs out of budget."""
+    return signsimp(powsimp(expr))
+
+
+def _boundedSimplify(expr, seconds=None, ops=None):
+    """expr.simplify() within a budget, falling back to cheaper canonicalization.
+
+    Simplify gets 3/4 of `seconds` ; if it runs out, or `expr` has more than `ops`
+    operations (count_ops), _canonical gets the rest, then `expr` is kept as is.
+    With a time limit each step runs in a subprocess, see _runUntil.
+
+    :param expr: sympy.Expr
+    :param seconds: float or None for no time limit
+    :param ops: int or None for no operation limit
+    :return: (sympy.Expr, degraded) ; degraded is None, 'canonical' or 'unsimplified'
+    """
+    if ops is None or count_ops(expr) <= ops:
+        done, simplified = _runUntil(_simplified, (expr,), None if seconds is None else seconds * .75)
+        if done:
+            return simplified, None
+        seconds = seconds * .25
+    done, canonical = _runUntil(_canonical, (expr,), seconds)
+    if done:
+        return canonical, 'canonical'
+    return expr, 'unsimplified'
+
+
+# outcome of a widget's evaluation pipeline
+#   error: error status for setError, expr: sympy.Expr or None,
+#   value: evaluated expr or None, display: str for displayValue,
+#   quantity: (text, parsed expr before conversion) or None, see SympyEntryWidget
+#   degraded: None, or the fallback used when simplification ran out of budget, see _boundedSimplify
+_Evaluation = namedtuple('_Evaluation', 'error expr value display quantity degraded')
+_Evaluation.__new__.__defaults__ = (None, None)
+
+
+_layoutTokens = (NEWLINE, NL, INDENT, DEDENT, ENDMARKER)
+
+
+def _textSignature(text):
+    """Normalized token signature of `text`, equal for texts that parse the same because
+    they only differ in whitespace between tokens (or `^` written as `**`).
+    Text that does not tokenize is its own signature.
+
+    :param text: str
+    :return: tuple or str
+    """
+    try:
+        return tuple('**' if t.string == '^' else t.string
+                     for t in generate_tokens(StringIO(text).readline) if t.type not in _layoutTokens)
+    except (TokenError, SyntaxError):
+        return text
+
+
+def _collectStages(func, args, timed=True):
+    """Run `func(*args)`, collecting the durations of its pipeline stages when `timed`.
+
+    :return: (result, list of (stage, seconds), total seconds) ; (result, None, None) if not `timed`
+    """
+    if not timed:
+        return func(*args), None, None
+    previous = getattr(_traceLocal, 'stages', None)
+    stages = _traceLocal.stages = []
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+    finally:
+        _traceLocal.stages = previous
+    return result, stages, time.perf_counter() - start
+
+
+class PipelineStats():
+    """Rolling window of a widget's evaluation times, per pipeline stage.
 
-    :param expr: sympy.Expr
-    :param unit: str\\units.Quantity\\units.Dimension
-    :return: sympy.Expr or None
+    Stages: 'safety', 'parse', 'simplify', 'dimension', 'convert', 'evalf',
+        'signals' (applying the result and emitting signals), and 'total' per evaluation.
+    Stages that did not run (eg. parse cache hits) are not recorded for that evaluation.
     """
-    logger.log(logging.DEBUG-1, f'convertTo({expr}, {unit})')
-    if expr is None:
-        return None
+    bins = (1e-4, 1e-3, 1e-2, 1e-1, 1.0)  # histogram bucket upper edges, seconds
 
-    if isinstance(unit, str):
-        try:
-            unit = unitSubs[unit]
-        except KeyError:
-            unit = parseExpr(unit)
-    u = unit
+    def __init__(self, window=64):
+        self.window = window
+        self.counts = dict()  # {stage: evaluations ever recorded}
+        self._samples = dict()  # {stage: deque of seconds}
 
-    logger.log(logging.DEBUG-1, f'convertTo() expr {expr}, u {u}')
-    dim = getDimension(expr)
-    logger.log(logging.DEBUG - 1, f'convertTo() dim = {dim}')
-    if dim is None:
-        _ret = expr * u
-    if dim is not None and dim.name == 1:
-        _ret = expr * u
-    else:
-        _ret = units.convert_to(expr, u)
+    def add(self, stages, total):
+        """Record one evaluation.
 
-    logger.log(logging.DEBUG-1, f'convertTo() -> {str(_ret)}')
-    return _ret
+        :param stages: iterable of (stage, seconds) ; repeated stages are summed
+        :param total: seconds
+        """
+        summed = {'total': total}
+        for stage, duration in stages:
+            summed[stage] = summed.get(stage, 0.) + duration
+        for stage, duration in summed.items():
+            try:
+                self._samples[stage].append(duration)
+            except KeyError:
+                self._samples[stage] = deque([duration], maxlen=self.window)
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def summary(self):
+        """Get statistics of the evaluations in the window, per stage.
+
+        :return: {stage: dict(count, last, mean, median, max, histogram)} ; times in seconds,
+            histogram is counts per bucket of `bins`, plus one for slower samples
+        """
+        rv = dict()
+        for stage, samples in self._samples.items():
+            ordered = sorted(samples)
+            histogram = [0] * (len(self.bins) + 1)
+            for t in samples:
+                histogram[bisect_left(self.bins, t)] += 1
+            rv[stage] = dict(count=self.counts[stage], last=samples[-1], mean=sum(samples) / len(samples),
+                             median=ordered[len(ordered) // 2], max=ordered[-1], histogram=histogram)
+        return rv
 
+    def clear(self):
+        self.counts.clear()
+        self._samples.clear()
 
-def parseUnits(text, dimension=None):
-    """Parse a string with units possibly included.
-    See parseExpr for pre-processing steps.
 
-    Raises ExpressionError same as parseExpr.
-    Raises UnitMisMatchError if the expression has incompatible units.
+class _EvaluationTask(QRunnable):
+    """Runs `func(*args)` on a QThreadPool, reporting through `evaluator.finished`."""
+    def __init__(self, evaluator, generation, func, args):
+        QRunnable.__init__(self)
+        self.evaluator = evaluator
+        self.generation = generation
+        self.func = func
+        self.args = args
+        self.timed = evaluator.timed
 
-    :param text: str
-    :return: sympy.Expr or None
-    """
-    logger.log(logging.DEBUG - 1, f'parseUnits({text})')
+    def run(self):
+        if self.generation != self.evaluator.generation:
+            return  # superseded while queued
+        try:
+            result = _collectStages(self.func, self.args, self.timed)
+        except Exception as e:
+            result = e
+        try:
+            self.evaluator.finished.emit(self.generation, result)
+        except RuntimeError:  # widget was deleted while evaluating
+            pass
 
-    if text == '':
-        return None
-    text = text.replace('^', '**')
-    err = _notSafeError(text) or _keywordError(text)
 
-    try:
-        expr = parse_expr(text, evaluate=False, local_dict=unitSubs)
-        str(expr)  # catch some problems
-    except AttributeError as e:
-        raise ExpressionError("Unknown function call")
-    except (TokenError, SyntaxError, TypeError) as e:
-        raise ExpressionError("Syntax error")
-    except Exception as e:
-        raise ExpressionError((type(e).__name__, repr(e)))
-    if isinstance(expr, Function):
-        raise ExpressionError('Function is not a valid expression')
+class _Evaluator(QObject):
+    """Runs a widget's evaluation pipeline and applies the result.
 
-    try:
-        expr = quantity_simplify(expr)
-    except TypeError:
-        pass
+    Synchronous by default. When `asynchronous`, the pipeline runs on a
+    QThreadPool worker; each request gets a generation number and only the
+    result of the latest request is applied (to `target` with setError).
+    `target` shows `pendingColors` while work is in flight.
 
-    try:
-        unitsAreConsistent(expr, dimension)
-    except UnitMisMatchError as e:
-        raise e
-    return expr
+    Stage times of each evaluation are recorded in `stats` when `collectStats`, and
+    `slow` is emitted with the total time when it exceeds `slowThreshold` ; neither
+    set, evaluations are not timed.
 
+    A request with the same arguments as the latest one is skipped, leaving the
+    target's expression, value and error status as they are ; the first argument,
+    the text, is compared by `signature(text)` when given (see _textSignature).
+    A superseded evaluation still queued is skipped ; one already running finishes, and
+    its result is discarded.
+    """
+    finished = pyqtSignal(int, object)
+    slow = pyqtSignal(float)
+
+    def __init__(self, apply, parent=None, target=None, asynchronous=False, pendingColors=None,
+                 slowThreshold=None, signature=None, collectStats=False):
+        QObject.__init__(self, parent)
+        self.apply = apply
+        self.signature = signature
+        self.lastKey = None  # arguments of the latest request, see key
+        self.target = target
+        self.asynchronous = asynchronous
+        self.pendingColors = pendingColors
+        self.slowThreshold = slowThreshold
+        self.collectStats = collectStats
+        self.stats = PipelineStats()
+        self.pool = None
+        self.generation = 0
+        self.pending = None
+        self.finished.connect(self._onFinished)
+
+    @property
+    def timed(self):
+        """Whether evaluations are timed, see _collectStages."""
+        return self.collectStats or self.slowThreshold is not None
+
+    def run(self, func, *args):
+        """Evaluate `func(*args)`.
+
+        :return: error status from `apply` when synchronous,
+                 target's current error status when asynchronous
+        """
+        key = self.key(args)
+        if key == self.lastKey:
+            return self.target.getError()
+        self.lastKey = None  # until the result is in
+        self.generation += 1
+        if not self.asynchronous:
+            self.pending = None
+            error = self._apply(*_collectStages(func, args, self.timed))
+            self.lastKey = key
+            return error
+
+        self.lastKey = key
+        self.pending = self.generation
+        pool = self.pool or QThreadPool.globalInstance()
+        pool.start(_EvaluationTask(self, self.generation, func, args))
+        QTimer.singleShot(0, self._showPending)
+        return self.target.getError()
+
+    def key(self, args):
+        """Key comparing the arguments of requests.
+
+        :param args: tuple, (text, other arguments)
+        :return: tuple
+        """
+        text = args[0] if self.signature is None else self.signature(args[0])
+        return (text,) + tuple(args[1:])
+
+    def cancel(self):
+        """Discard the result of any evaluation in flight."""
+        self.generation += 1
+        self.pending = None
+        self.lastKey = None
+
+    def _showPending(self):
+        if self.pending == self.generation and self.pendingColors is not None:
+            self.target.setStyleSheet(self.target.makeStyleString(self.pendingColors))
+
+    def _onFinished(self, generation, result):
+        if generation != self.generation:
+            return  # a newer request superseded this one
+        self.pending = None
+        if isinstance(result, Exception):  # a bug in the pipeline, shown as an error rather than raised in a slot
+            self.lastKey = None
+            logger.warning('evaluation failed: %r', result)
+            if not isinstance(result, (ExpressionError, UnitMisMatchError)):
+                result = ExpressionError(f'{type(result).__name__}: {result}')
+            self.target.setError(self.apply(_Evaluation(result, None, None, '- - -')))
+            return
+        self.target.setError(self._apply(*result))
+
+    def _apply(self, result, stages, duration):
+        """Apply `result`, recording the evaluation's stage times if it was timed.
+
+        :return: error status from `apply`
+        """
+        if stages is None:
+            return self.apply(result)
+        start = time.perf_counter()
+        error = self.apply(result)
+        signals = time.perf_counter() - start
+        stages.append(('signals', signals))
+        total = duration + signals
+        self.stats.add(stages, total)
+        if self.slowThreshold is not None and total > self.slowThreshold:
+            self.slow.emit(total)
+        return error
 
-def unitsAreConsistent(expr, targetUnits=None):
-    """Check if an expression's units are compatible.
-    If `targetUnits` provided, also checks for compatibility for
-    converting to `targetUnits`.
 
-    Raises UnitMisMatchError when applicable.
+_printed = [None, None]  # [value, str(value)] of the latest value emitted as str
 
-    Notes:
-    If `targetUnits` is a units.Dimension, requires `expr` to
-        evaluate to units with same units.Dimension (eg. must include units in `expr`)
-    If `expr` has dimension of `1` (unit-less), returns `True`
-        barring other errors or targetUnits being units.Dimension.
 
-    :param expr: sympy.Expr
-    :param targetUnits: str\\units.Quantity\\units.Dimension
-    :return: True or raises UnitMisMatchError
+def _emitOverloads(sender, signal, value):
+    """Emit `value` with the [object] overload of `signal`, and the [str] and no-argument
+    overloads only if they have receivers ; str(value) is computed once per value.
+
+    :param sender: QObject owning `signal`
+    :param signal: bound signal declared pyqtSignal([], [object], [str])
+    :param value: object
     """
-    logger.log(logging.DEBUG - 1, f'unitsAreConsistent({expr}, {targetUnits})')
+    signal[object].emit(value)
+    if sender.receivers(signal[str]):
+        if _printed[0] is not value:
+            _printed[:] = value, str(value)
+        signal[str].emit(_printed[1])
+    if sender.receivers(signal):
+        signal.emit()
+
+
+class _EvaluatorMethods():
+    """Methods of the widgets evaluating text with an _Evaluator, `self._evaluator`."""
+    def setAsyncEvaluation(self, asynchronous):
+        """Set whether errorCheck evaluates text on a QThreadPool worker.
+        While a result is pending the widget shows its pending colors, and only
+        the result for the latest text is applied.
+
+        :param asynchronous: bool
+        """
+        self._evaluator.cancel()
+        self._evaluator.asynchronous = bool(asynchronous)
 
-    try:
-        # rough check within expression
-        check_dimensions(expr)
-        logger.log(logging.DEBUG-1, f"check_dimensions -> {bool(check_dimensions(expr))}")
-    except ValueError as e:
-        raise UnitMisMatchError(repr(e))
-    except TypeError as e:
-        raise UnitMisMatchError(repr(e))
+    def isAsyncEvaluation(self):
+        return self._evaluator.asynchronous
 
-    expr_dim = getDimension(expr)
-    logger.log(logging.DEBUG-1, f"expr_dim = {expr_dim}")
-    if expr_dim is None:
-        raise UnitMisMatchError("Dimension could not be determined")
+    def isEvaluating(self):
+        """Whether an asynchronous evaluation is in flight."""
+        return self._evaluator.pending is not None
 
-    if targetUnits is None:
-        return True
+    def stats(self):
+        """Get timing statistics of the widget's recent evaluations, per pipeline stage,
+        recorded while collecting them (see setCollectStats). See PipelineStats.summary.
 
-    # get dimensions of target units
-    if isinstance(targetUnits, str):
-        try:
-            targetUnits = unitSubs[targetUnits]
-        except KeyError:
-            targetUnits = parseUnits(targetUnits)
+        :return: dict
+        """
+        return self._evaluator.stats.summary()
 
-    target_dim = getDimension(targetUnits)
-    logger.log(logging.DEBUG-1, f"target_dim = {target_dim}")
+    def setCollectStats(self, collect):
+        """Set whether the time of every evaluation is recorded for stats.
 
-    if isinstance(targetUnits, units.Dimension):
-        if targetUnits.name == expr_dim.name:
-            return True
-        else:
-            raise UnitMisMatchError(f"{expr_dim} is not specified {target_dim}")
+        :param collect: bool
+        """
+        self._evaluator.collectStats = bool(collect)
 
-    # compare dimensions
-    if expr_dim.name == 1 or expr_dim.name == target_dim.name:
-        return True
-    else:
-        raise UnitMisMatchError(f"{expr_dim} incompatible with {target_dim}")
+    def isCollectingStats(self):
+        return self._evaluator.collectStats
+
+    def setSlowThreshold(self, seconds):
+        """Emit slowEvaluation when an evaluation takes longer than `seconds`.
+
+        :param seconds: float, or None to disable
+        """
+        self._evaluator.slowThreshold = seconds
 
+    def getSlowThreshold(self):
+        return self._evaluator.slowThreshold
 
-class SymbolEdit(AutoColorLineEdit):
+
+class SymbolEdit(_EvaluatorMethods, AutoColorLineEdit):
     """AutoColorLineEdit subclass, changes text to a Symbol name.
     Added signals:
         exprChanged([]],[object],[str])  # emitted when the expression is successfully changed
 
     Added methods:
         getExpr: get the widget's current sympy.Expr (after processing by errorCheck)
+        setAsyncEvaluation: evaluate text on a QThreadPool worker instead of the GUI thread
+        isEvaluating: whether an asynchronous evaluation is in flight
+        stats: get timing statistics of the widget's evaluations, per pipeline stage
+        setCollectStats: record the time of every evaluation for stats (see defaultArgs collectStats)
+        setSlowThreshold: emit slowEvaluation when an evaluation takes longer (seconds, None to disable)
+
+    Added signals:
+        slowEvaluation(float)  # emitted with an evaluation's time when it exceeds the slow threshold
     """
     exprChanged = pyqtSignal([], [object], [str])
+    slowEvaluation = pyqtSignal(float)
+    _signature = None  # compare text exactly when skipping unchanged text, whitespace is significant in names
+
+    defaultArgs = AutoColorLineEdit.defaultArgs.copy()
+    defaultArgs.update(asyncEvaluation=False, pendingColors=('lightyellow', 'black'), slowThreshold=None,
+                       collectStats=False)
 
     def __init__(self, parent=None, **kwargs):
         self._expr = None
+        asyncEvaluation = kwargs.pop('asyncEvaluation', self.defaultArgs['asyncEvaluation'])
+        self._evaluator = _Evaluator(self._applyEvaluation,
+                                     pendingColors=kwargs.pop('pendingColors', self.defaultArgs['pendingColors']),
+                                     slowThreshold=kwargs.pop('slowThreshold', self.defaultArgs['slowThreshold']),
+                                     signature=self._signature,
+                                     collectStats=kwargs.pop('collectStats', self.defaultArgs['collectStats']))
         AutoColorLineEdit.__init__(self, parent, **kwargs)
-        self.exprChanged[object].connect(lambda o: self.exprChanged[str].emit(str(o)))
-        self.exprChanged[object].connect(lambda o: self.exprChanged.emit())
+        self._evaluator.slow.connect(self.slowEvaluation.emit)
+        self._evaluator.setParent(self)
+        self._evaluator.target = self
+        self._evaluator.asynchronous = asyncEvaluation
 
     @staticmethod
     def errorCheck(self):
@@ -436,22 +2582,36 @@ class SymbolEdit(AutoColorLineEdit):
                  False if no error
                  None if resulting expression is None
         """
-        self.logger.log(logging.DEBUG-1, f'errorCheck()')
+        self.logger.log(logging.DEBUG-1, 'errorCheck()')
+        return self._evaluator.run(self._evaluate, self.text())
+
+    @staticmethod
+    def _evaluate(text):
+        """Evaluation pipeline of errorCheck, safe to run off the GUI thread.
+
+        :return: _Evaluation
+        """
         try:
-            expr = textToSymbol(self.text())
+            expr = textToSymbol(text)
         except ExpressionError as e:
-            self.logger.log(logging.DEBUG-1, f'errorCheck() -> {repr(e)}')
-            self._expr = None
-            return e
-
+            return _Evaluation(e, None, None, None)
         if expr is None:
-            self.logger.log(logging.DEBUG-1, 'errorCheck() -> None')
-            self._expr = None
-            return None
-        self.logger.log(logging.DEBUG-1, 'errorCheck() -> False')
-        self._expr = expr
-        self.exprChanged[object].emit(expr)
-        return False
+            return _Evaluation(None, None, None, None)
+        return _Evaluation(False, expr, None, None)
+
+    def _applyEvaluation(self, result):
+        """Store `result` of _evaluate and emit signals.
+
+        :return: error status
+        """
+        self.logger.log(logging.DEBUG-1, 'errorCheck() -> %r', result.error)
+        self._expr = result.expr
+        if result.error is False:
+            _emitOverloads(self, self.exprChanged, result.expr)
+        return result.error
+
+    # declared on the QObject subclass, so Qt registers the property
+    asyncEvaluation = pyqtProperty(bool, _EvaluatorMethods.isAsyncEvaluation, _EvaluatorMethods.setAsyncEvaluation)
 
     def getExpr(self):
         return self._expr
@@ -471,15 +2631,32 @@ class ExprEdit(SymbolEdit):
         getExpr: get the widget's current sympy.Expr (after processing by errorCheck)
         getValue: uses sympy's evalf on the widget's expression, passing all arguments
         getSymbols: get a dict of the free symbols in widget's expression ; {symbol name:Symbol}
+        compile: get a numpy-vectorized callable of the widget's expression (see compileExpr)
+        setNumeric: set numeric mode of widget's value, 'exact', 'float64' or digits of precision (see evaluateNumeric)
+        setSimplifyBudget: limit simplification time (seconds) and size (operations)
+        isDegraded: whether simplification ran out of budget and fell back to a cheaper form
+
+    Added signals:
+        simplifyDegraded(str)  # emitted with the fallback used ('canonical' or 'unsimplified') when simplification runs out of budget
     """
     valueChanged = pyqtSignal([], [object], [str])
     displayValue = pyqtSignal(str)
+    simplifyDegraded = pyqtSignal(str)
+    _signature = staticmethod(_textSignature)
+
+    defaultArgs = SymbolEdit.defaultArgs.copy()
+    defaultArgs.update(numeric=15, simplifyBudget=None, simplifyOps=None)
 
     def __init__(self, parent=None, **kwargs):
         self._expr = None
+        self._compiled = None
+        self._degraded = None
+        self._numeric = _checkNumeric(kwargs.pop('numeric', self.defaultArgs['numeric']))
+        self._budget = (kwargs.pop('simplifyBudget', self.defaultArgs['simplifyBudget']),
+                        kwargs.pop('simplifyOps', self.defaultArgs['simplifyOps']))
+        if self._budget[0] is not None:
+            _boundedCalls.warm()
         SymbolEdit.__init__(self, parent, **kwargs)
-        self.valueChanged[object].connect(lambda o: self.valueChanged[str].emit(str(o)))
-        self.valueChanged[object].connect(lambda o: self.valueChanged.emit())
 
     @staticmethod
     def errorCheck(self):
@@ -491,50 +2668,102 @@ class ExprEdit(SymbolEdit):
                  False if no error
                  None if resulting expression is None
         """
-        self.logger.log(logging.DEBUG-1, f'errorCheck()')
+        self.logger.log(logging.DEBUG-1, 'errorCheck()')
+        return self._evaluator.run(self._evaluate, self.text(), self._numeric, self._budget)
 
+    @staticmethod
+    def _evaluate(text, numeric=15, budget=(None, None)):
         try:
-            expr = parseExpr(self.text())
+            expr = parseExpr(text)
         except ExpressionError as e:
-            self.logger.log(logging.DEBUG-1, f'errorCheck() -> {repr(e)}')
-            self.exprChanged[object].emit(None)
-            self.valueChanged[object].emit(None)
-            self.displayValue.emit('- - -')
-            self._expr = None
-            return e
+            return _Evaluation(e, None, None, '- - -')
 
         if expr is None:
-            self.logger.log(logging.DEBUG-1, 'errorCheck() -> None')
-            self.exprChanged[object].emit(None)
-            self.valueChanged[object].emit(None)
-            self.displayValue.emit('- - -')
-            self._expr = None
-            return None
-        self.logger.log(logging.DEBUG-1, 'errorCheck() -> False')
-        try:
-            self._expr = expr.simplify()
-        except TypeError:
-            self._expr = expr
-        self.exprChanged[object].emit(self._expr)
-        self.valueChanged[object].emit(self._expr.simplify().evalf())
-        self.displayValue.emit(str(self._expr.evalf(4)))
-        return False
-
-    def getValue(self, *args, **kwargs):
-        """Get the widget's evaluated expression's value.
-        All arguments passed to sympy's evalf.
+            return _Evaluation(None, None, None, '- - -')
+        start = _traceStart()
+        expr, degraded = _boundedSimplify(expr, *budget)
+        _trace('simplify', 'ExprEdit._evaluate', start)
+        start = _traceStart()
+        value = evaluateNumeric(expr, numeric)
+        display = _displayValue(value)
+        _trace('evalf', 'ExprEdit._evaluate', start)
+        return _Evaluation(False, expr, value, display, None, degraded)
+
+    def _applyEvaluation(self, result):
+        self.logger.log(logging.DEBUG-1, 'errorCheck() -> %r', result.error)
+        self._expr = result.expr
+        self._degraded = result.degraded
+        if result.degraded is not None:
+            self.logger.debug('errorCheck() simplification degraded to %s', result.degraded)
+            self.simplifyDegraded.emit(result.degraded)
+        _emitOverloads(self, self.exprChanged, result.expr)
+        _emitOverloads(self, self.valueChanged, result.value)
+        self.displayValue.emit(result.display)
+        return result.error
+
+    def getValue(self, *args, numeric=None, **kwargs):
+        """Get the widget's evaluated expression's value, in the widget's numeric mode.
+        Other arguments are passed to sympy's evalf.
 
         :param args, kwargs: passed to evalf
-        :return: sympy.Expr or None if self._expr is None
+        :param numeric: 'exact', 'float64' or int, numeric mode of this call ; see evaluateNumeric
+        :return: sympy.Expr, float, QuantityValue or None if self._expr is None
         """
         if self._expr is None:
             return None
-        return self._expr.evalf(*args, **kwargs)
+        if args or kwargs:
+            return self._expr.evalf(*args, **kwargs)
+        return evaluateNumeric(self._expr, self._numeric if numeric is None else numeric)
+
+    def setNumeric(self, numeric):
+        """Set the numeric mode of the widget's value, and evaluate text again.
+
+        :param numeric: 'exact', 'float64' or int, digits of precision ; see evaluateNumeric
+        """
+        self._numeric = _checkNumeric(numeric)
+        self.setError(self.errorCheck(self))
+
+    def getNumeric(self):
+        return self._numeric
+
+    def setSimplifyBudget(self, seconds, ops=None):
+        """Limit simplification of the widget's expression, and evaluate text again.
+        Past the limit the expression falls back to a cheaper canonical form, or stays
+        unsimplified ; see isDegraded.
+
+        :param seconds: float, time limit, None for no limit ; simplification then runs in a subprocess
+        :param ops: int, skip full simplification of expressions with more operations (count_ops), None for no limit
+        """
+        self._budget = (seconds, ops)
+        if seconds is not None:
+            _boundedCalls.warm()
+        self.setError(self.errorCheck(self))
+
+    def getSimplifyBudget(self):
+        """:return: (seconds, ops)"""
+        return self._budget
+
+    def isDegraded(self):
+        """Whether simplification of the current expression ran out of budget."""
+        return self._degraded is not None
 
     def getSymbols(self):
         rv = {k.name: k for k in self._expr.free_symbols} if self._expr else dict()
         return rv
 
+    def compile(self, unit=None, symbols=None):
+        """Get a numpy-vectorized callable of the widget's expression, taking its free symbols as arguments.
+        The callable is reused until the widget's expression changes.
+
+        :param unit: str\\units.Quantity\\sympy.Expr, output units ; see compileExpr
+        :param symbols: iterable of Symbols, the callable's arguments ; see compileExpr
+        :return: function or None if self._expr is None
+        """
+        key = (self._expr, unit, None if symbols is None else tuple(symbols))
+        if self._compiled is None or self._compiled[0] != key:
+            self._compiled = (key, compileExpr(self._expr, unit, symbols))
+        return self._compiled[1]
+
 
 class UnitEdit(ExprEdit):
     """ExprEdit subclass, includes support for units.
@@ -551,6 +2780,8 @@ class UnitEdit(ExprEdit):
         getMagnitude: get scale\\magnitude\\value of widget's expression without units
         convertTo: convert widget's expression to different units
         getUnits: get units of widget's expression
+        getQuantity: get widget's expression as a QuantityValue
+        compile: get a numpy-vectorized callable of the widget's expression (see compileExpr)
     """
     @staticmethod
     def errorCheck(self):
@@ -564,31 +2795,30 @@ class UnitEdit(ExprEdit):
                  False if no error
                  None if resulting expression is None
         """
-        self.logger.log(logging.DEBUG-1, f'errorCheck()')
+        self.logger.log(logging.DEBUG-1, 'errorCheck()')
+        return self._evaluator.run(self._evaluate, self.text(), None, self._numeric, self._budget)
+
+    @staticmethod
+    def _evaluate(text, dimension=None, numeric=15, budget=(None, None)):
         try:
-            expr = parseUnits(self.text())
+            expr = parseUnits(text, dimension)
         except (ExpressionError, UnitMisMatchError) as e:
-            self.logger.log(logging.DEBUG-1, f'errorCheck() -> {repr(e)}')
-            self._expr = None
-            self.exprChanged[object].emit(None)
-            self.valueChanged[object].emit(None)
-            self.displayValue.emit('- - -')
-            return e
+            return _Evaluation(e, None, None, '- - -')
 
         if expr is None:
-            self.logger.log(logging.DEBUG-1, 'errorCheck() -> None')
-            self._expr = None
-            self.exprChanged[object].emit(None)
-            self.valueChanged[object].emit(None)
-            self.displayValue.emit('- - -')
-            return None
-        # else:  # no problems
-        self.logger.log(logging.DEBUG-1, 'errorCheck() -> False')
-        self._expr = quantity_simplify(expr)
-        self.exprChanged[object].emit(self._expr)
-        self.valueChanged[object].emit(self._expr.simplify().evalf())
-        self.displayValue.emit(str(self._expr.evalf(4)))
-        return False
+            return _Evaluation(None, None, None, '- - -')
+        # else:  # no problems, `expr` is already quantity_simplify'd by parseUnits
+        start = _traceStart()
+        value = _floatValue(expr) if numeric == 'float64' else None
+        degraded = None
+        if value is None:
+            value, degraded = _boundedSimplify(expr, *budget)
+            _trace('simplify', 'UnitEdit._evaluate', start)
+            start = _traceStart()
+            value = evaluateNumeric(value, numeric)
+        display = _displayValue(value)
+        _trace('evalf', 'UnitEdit._evaluate', start)
+        return _Evaluation(False, expr, value, display, None, degraded)
 
     def getDimension(self):
         """Get the units.Dimension expression of `self`.
@@ -605,11 +2835,25 @@ class UnitEdit(ExprEdit):
         :return: sympy.Expr or None
         """
         if self._expr is not None:
-            return self._expr.args[0]
+            return _splitQuantity(self._expr)[0]
         else:
             return None
 
-    def convertTo(self, unit, eval=False):
+    def getQuantity(self, exact=False):
+        """Get `self`s expression as a QuantityValue, in its own units.
+        If self._expr is None or its magnitude is not a number (eg. has free symbols), returns None.
+
+        :param exact: bool, keep rational magnitudes as Fraction instead of float
+        :return: QuantityValue or None
+        """
+        if self._expr is None:
+            return None
+        try:
+            return QuantityValue.fromExpr(self._expr, exact=exact)
+        except ValueError:
+            return None
+
+    def convertTo(self, unit, eval=False, numeric=None):
         """Wraps units.convert_to for extra functionality.
 
         Extra features:
@@ -617,15 +2861,15 @@ class UnitEdit(ExprEdit):
             If `self`s expression has no units, returns `expr * unit`.
 
         :param unit: str\\units.Quantity\\units.Dimension
-        :param eval: bool, whether to evaluate resulting expression
-        :return: sympy.Expr or None
+        :param eval: bool, whether to evaluate resulting expression in the widget's numeric mode
+        :param numeric: 'exact', 'float64' or int, numeric mode of this call ; see evaluateNumeric
+        :return: sympy.Expr, QuantityValue ('float64') or None
         """
         if self._expr is None:
             return None
-        rv = convertTo(self._expr, unit)
-        if eval is True:
-            return rv.evalf()
-        return rv
+        if numeric is None:
+            numeric = self._numeric if eval is True else 'exact'
+        return convertTo(self._expr, unit, numeric)
 
     def getUnits(self):
         """Get unit Symbols in `self`s expression.
@@ -637,7 +2881,7 @@ class UnitEdit(ExprEdit):
         """
         if self._expr is not None:
             if self._expr.atoms(units.Quantity):
-                return self._expr.args[1]
+                return _splitQuantity(self._expr)[1]
             else:
                 return 1
         else:
@@ -653,14 +2897,9 @@ class DimensionEdit(UnitEdit):
     defaultArgs.update(dimension=units.Dimension('length'))
 
     def __init__(self, parent=None, **kwargs):
-        dim = kwargs.pop('dimension', self.defaultArgs['dimension'])
-        if isinstance(dim, str):
-            if not _notSafeError(dim):
-                new_dim = parse_expr(dim.replace('^', '**'), local_dict=_storage.dimensions)
-                if not isinstance(new_dim, units.Dimension):
-                    raise TypeError(f"Cannot create Dimension from '{dim}'")
-                dim = new_dim
+        dim = _parseDimension(kwargs.pop('dimension', self.defaultArgs['dimension']))
         self._dimension = dim
+        self._target = dimensionVector(dim) or dim
         UnitEdit.__init__(self, parent, **kwargs)
 
     @staticmethod
@@ -675,44 +2914,18 @@ class DimensionEdit(UnitEdit):
                  False if no error
                  None if resulting expression is None
         """
-        self.logger.log(logging.DEBUG-1, f'errorCheck()')
-        try:
-            expr = parseUnits(self.text(), self._dimension)
-        except (ExpressionError, UnitMisMatchError) as e:
-            self.logger.log(logging.DEBUG-1, f'errorCheck() -> {repr(e)}')
-            self._expr = None
-            self.exprChanged[object].emit(None)
-            self.valueChanged[object].emit(None)
-            self.displayValue.emit('- - -')
-            return e
-
-        if expr is None:
-            self.logger.log(logging.DEBUG-1, 'errorCheck() -> None')
-            self._expr = None
-            self.exprChanged[object].emit(None)
-            self.valueChanged[object].emit(None)
-            self.displayValue.emit('- - -')
-            return None
-        # else:  # no problems
-        self.logger.log(logging.DEBUG-1, 'errorCheck() -> False')
-        self._expr = quantity_simplify(expr)
-        self.exprChanged[object].emit(self._expr)
-        self.valueChanged[object].emit(self._expr.simplify().evalf())
-        self.displayValue.emit(str(self._expr.evalf(4)))
-        return False
+        self.logger.log(logging.DEBUG-1, 'errorCheck()')
+        return self._evaluator.run(self._evaluate, self.text(), self._target, self._numeric, self._budget)
 
     def setDimension(self, dim):
         """Set the units.Dimension of `self`.
         :return:
         """
-        self.logger.debug(f"setDimension({type(dim), dim})")
-        if isinstance(dim, str):
-            if not _notSafeError(dim):
-                new_dim = parse_expr(dim.replace('^', '**'), local_dict=_storage.dimensions)
-                if not isinstance(new_dim, units.Dimension):
-                    raise TypeError(f"Cannot create Dimension from '{dim}'")
-                dim = new_dim
+        self.logger.debug("setDimension(%s)", (type(dim), dim))
+        dim = _parseDimension(dim)
         self._dimension = dim
+        # dimension vector when it can be determined, checked instead of the units.Dimension
+        self._target = dimensionVector(dim) or dim
         self.setError(self.errorCheck(self))
 
     def getDimension(self):
@@ -723,7 +2936,7 @@ class DimensionEdit(UnitEdit):
     dimension = pyqtProperty(str, lambda s: str(s.getDimension().name), setDimension)
 
 
-class SympyEntryWidget(EntryWidget):
+class SympyEntryWidget(_EvaluatorMethods, EntryWidget):
     """EntryWidget subclass using DimensionEdit.
 
     Added signals:
@@ -738,6 +2951,14 @@ class SympyEntryWidget(EntryWidget):
         convertTo: convert widget's expression to different units
         getUnits: get units selected in widget's comboBox
         setUnits: change widget's comboBox units (raise ValueError if `unit` is not an option)
+        getQuantity: get widget's expression as a QuantityValue in comboBox's selected units
+        compile: get a numpy-vectorized callable of the widget's expression in comboBox's selected units
+        setAsyncEvaluation: evaluate text on a QThreadPool worker instead of the GUI thread
+        isEvaluating: whether an asynchronous evaluation is in flight
+        stats: get timing statistics of the widget's evaluations, per pipeline stage
+        setCollectStats: record the time of every evaluation for stats (see defaultArgs collectStats)
+        setSlowThreshold: emit slowEvaluation when an evaluation takes longer (seconds, None to disable)
+        setNumeric: set numeric mode of widget's value, 'exact', 'float64' or digits of precision (see evaluateNumeric)
 
     written by Tim Olson - timjolson@user.noreplay.github.com
     """
@@ -748,32 +2969,38 @@ class SympyEntryWidget(EntryWidget):
     valueChanged = pyqtSignal([], [object], [str])
     exprChanged = pyqtSignal([], [object], [str])
     displayValue = pyqtSignal(str)
+    slowEvaluation = pyqtSignal(float)
 
     defaultArgs = EntryWidget.defaultArgs.copy()
-    defaultArgs.update(options=CommonUnits.length, label='Label')
+    defaultArgs.update(options=CommonUnits.length, label='Label',
+                       asyncEvaluation=False, pendingColors=SymbolEdit.defaultArgs['pendingColors'],
+                       slowThreshold=None, collectStats=False, numeric=15)
 
     getSymbols, getExpr, convertTo = delegated.methods('lineEdit', 'getSymbols, getExpr, convertTo')
     getUnits = delegated.methods('comboBox', 'currentData')
 
     def __init__(self, parent=None, **kwargs):
         self._value = None
+        self._compiled = None
+        self._quantity = None  # (text, parsed expr) of the last evaluation that parsed
+        self._optionDimensions = dict()  # {unit: dimension vector}
         EntryWidget.__init__(self, parent, **kwargs)  # runs setupUi
 
     def setupUi(self, kwargs):
         options = kwargs.pop('options', self.defaultArgs['options'])
         if isinstance(options, str):
             options = getattr(CommonUnits, options)
+        if not isinstance(options, dict):
+            options = dict(options)  # composite families are generated, the comboBox needs them all
         optionFixed = kwargs.pop('optionFixed', self.defaultArgs['optionFixed'])
-
-        # connect signals to simpler versions
-        self.exprChanged[object].connect(lambda o: self.exprChanged[str].emit(str(o)))
-        self.exprChanged[object].connect(lambda o: self.exprChanged.emit())
-        self.valueChanged[object].connect(lambda o: self.valueChanged[str].emit(str(o)))
-        self.valueChanged[object].connect(lambda o: self.valueChanged.emit())
-        self.errorChanged[object].connect(lambda o: self.errorChanged[str].emit(str(o)))
-        self.errorChanged[object].connect(lambda o: self.errorChanged.emit())
-        self.hasError[object].connect(lambda o: self.hasError[str].emit(str(o)))
-        self.hasError[object].connect(lambda o: self.hasError.emit())
+        asyncEvaluation = kwargs.pop('asyncEvaluation', self.defaultArgs['asyncEvaluation'])
+        pendingColors = kwargs.pop('pendingColors', self.defaultArgs['pendingColors'])
+        slowThreshold = kwargs.pop('slowThreshold', self.defaultArgs['slowThreshold'])
+        collectStats = kwargs.pop('collectStats', self.defaultArgs['collectStats'])
+        self._numeric = _checkNumeric(kwargs.pop('numeric', self.defaultArgs['numeric']))
+
+        # connect signals to simpler versions ; str and no-argument overloads of the sympy
+        # signals are emitted by _emitOverloads, only when connected
         self.optionChanged[str].connect(lambda o: self.optionChanged.emit())
         self.optionIndexChanged[int].connect(lambda o: self.optionIndexChanged.emit())
 
@@ -785,13 +3012,21 @@ class SympyEntryWidget(EntryWidget):
             kwargs['errorCheck'] = lambda lineedit: ec(self)
         else:
             kwargs['errorCheck'] = lambda lineedit: self.errorCheck(self)
+        # re-scaling on option change stands in for the default errorCheck only
+        self._rescale = ec is None and type(self).errorCheck is SympyEntryWidget.errorCheck
         _label = kwargs.pop('label', self.defaultArgs['label'])
 
-        self.lineEdit = lineEdit = DimensionEdit(parent=self, **kwargs)
-        lineEdit.exprChanged[object].connect(self.exprChanged[object].emit)
+        self._evaluator = _Evaluator(self._applyEvaluation, parent=self, pendingColors=pendingColors,
+                                     slowThreshold=slowThreshold, signature=_textSignature,
+                                     collectStats=collectStats)
+        self._evaluator.slow.connect(self.slowEvaluation.emit)
+        self.lineEdit = lineEdit = DimensionEdit(parent=self, numeric=self._numeric, **kwargs)
+        self._evaluator.target = lineEdit
+        self._evaluator.asynchronous = asyncEvaluation
+        lineEdit.exprChanged[object].connect(lambda o: _emitOverloads(self, self.exprChanged, o))
         lineEdit.errorCleared.connect(self.errorCleared.emit)
-        lineEdit.errorChanged[object].connect(self.errorChanged[object].emit)
-        lineEdit.hasError[object].connect(self.hasError[object].emit)
+        lineEdit.errorChanged[object].connect(lambda o: _emitOverloads(self, self.errorChanged, o))
+        lineEdit.hasError[object].connect(lambda o: _emitOverloads(self, self.hasError, o))
         lineEdit.displayValue.connect(self.displayValue.emit)
 
         self._label = label = QtWidgets.QLabel(parent=self, text=_label)
@@ -800,10 +3035,14 @@ class SympyEntryWidget(EntryWidget):
         def formatNum(expr):
             if expr is None:
                 return '- - -'
+            if isinstance(expr, (QuantityValue, float)):
+                return f'{float(expr):.4g}'
             expr = expr.evalf(4)
             return str(withoutTypes(expr, (units.Dimension, units.Quantity)))
         self.valueChanged[object].connect(lambda o: self.output.setText(formatNum(o)))
 
+        for unit in options.values():
+            self._unitDimension(unit)
         self.comboBox = combo = DictComboBox(parent=self, options=options)
         combo.setDisabled(optionFixed)
         # combo.setSizeAdjustPolicy(DictComboBox.AdjustToContents)
@@ -833,80 +3072,138 @@ class SympyEntryWidget(EntryWidget):
                  False if no error
                  None if resulting expression is None
         """
-        self.logger.log(logging.DEBUG - 1, f'errorCheck() all')
-        self._value = None
-        self.lineEdit._expr = None
-
-        def emit_error(err):
-            self.logger.log(logging.DEBUG - 1, f'errorCheck() -> {repr(err)}')
-            self.exprChanged[object].emit(None)
-            self.valueChanged[object].emit(None)
-            self.displayValue.emit('- - -')
-            return err
-
-        def emit_none(reason):
-            self.logger.log(logging.DEBUG - 1, f'errorCheck() -> {repr(reason)}')
-            self.exprChanged[object].emit(None)
-            self.valueChanged[object].emit(None)
-            self.displayValue.emit('- - -')
-            return None
+        self.logger.log(logging.DEBUG - 1, 'errorCheck() all')
+        unit = self.getUnits()
+        return self._evaluator.run(self._evaluate, self.lineEdit.text(), unit, self._unitDimension(unit),
+                                   self._numeric)
 
-        text = self.lineEdit.text()
+    @staticmethod
+    def _evaluate(text, unit, dimension=None, numeric=15):
         if text == '':
-            return emit_none('empty text')
+            return _Evaluation(None, None, None, '- - -')
 
-        text = text.replace('^', '**')
         try:
-            err = _notSafeError(text) or _keywordError(text)
-        except ExpressionError as e:
-            return emit_error(e)
+            quantity = parseUnits(text)
+        except (ExpressionError, UnitMisMatchError) as e:
+            return _Evaluation(e, None, None, '- - -')
+        return SympyEntryWidget._convertQuantity(text, quantity, unit, dimension, numeric)
+
+    @staticmethod
+    def _convertQuantity(text, quantity, unit, dimension=None, numeric=15):
+        """Check parsed `quantity` against `dimension` and convert it to `unit`.
 
+        :return: _Evaluation
+        """
         try:
-            expr = parse_expr(text, evaluate=False, local_dict=unitSubs)
-            str(expr)  # catch some problems
-        except AttributeError as e:
-            err = ExpressionError("Unknown function call")
-        except (TokenError, SyntaxError) as e:
-            err = ExpressionError("Syntax error")
-        except Exception as e:
-            err = ExpressionError((type(e).__name__, repr(e)))
-        if err is False and isinstance(expr, Function):
-            err = ExpressionError('Function is not a valid expression')
+            unitsAreConsistent(quantity, dimension)
+        except UnitMisMatchError as e:
+            return _Evaluation(e, None, None, '- - -', (text, quantity))
+
+        expr = convertTo(quantity, unit)
+        start = _traceStart()
+        # float64 straight from the parsed magnitudes, not from the exact conversion
+        value = _floatValue(quantity, _resolveUnit(unit)) if numeric == 'float64' else None
+        if value is None:
+            value = evaluateNumeric(expr, numeric)
+        display = _displayValue(value)
+        _trace('evalf', 'SympyEntryWidget._convertQuantity', start)
+        return _Evaluation(False, expr, value, display, (text, quantity))
+
+    def _unitDimension(self, unit):
+        """Dimension vector of `unit`, computed once per unit.
+
+        :return: tuple or None
+        """
+        try:
+            return self._optionDimensions[unit]
+        except KeyError:
+            dim = self._optionDimensions[unit] = dimensionVector(unit)
+            return dim
+        except TypeError:  # unhashable
+            return dimensionVector(unit)
+
+    def _onOptionChanged(self, *args):
+        """Convert the widget's parsed quantity to the newly selected units,
+        evaluating text again only if it changed since it was parsed, or if
+        errorCheck is not the default one.
+        """
+        text = self.lineEdit.text()
+        if not self._rescale or self._quantity is None or _textSignature(self._quantity[0]) != _textSignature(text) \
+                or self.isEvaluating():
+            return EntryWidget._onOptionChanged(self, *args)
+        unit = self.getUnits()
+        self.logger.log(logging.DEBUG - 1, '_onOptionChanged() re-scale')
+        args = (text, self._quantity[1], unit, self._unitDimension(unit), self._numeric)
+        self.lineEdit.setError(self._evaluator._apply(*_collectStages(self._convertQuantity, args,
+                                                                     self._evaluator.timed)))
+        self._evaluator.lastKey = self._evaluator.key((text, unit, args[3], args[4]))
+
+    def _applyEvaluation(self, result):
+        self.logger.log(logging.DEBUG - 1, 'errorCheck() -> %r', result.error)
+        self._quantity = result.quantity
+        self.lineEdit._expr = result.expr
+        self._value = result.value
+        _emitOverloads(self, self.exprChanged, result.expr)
+        _emitOverloads(self, self.valueChanged, result.value)
+        self.displayValue.emit(result.display)
+        # finish errorCheck
+        return result.error
+
+    # declared on the QObject subclass, so Qt registers the property
+    asyncEvaluation = pyqtProperty(bool, _EvaluatorMethods.isAsyncEvaluation, _EvaluatorMethods.setAsyncEvaluation)
+
+    def getValue(self, *args, numeric=None, **kwargs):
+        """Get the widget's evaluated expression's value, in the widget's numeric mode.
+        :param *args, **kwargs: parameters passed to sympy's evalf()
+        :param numeric: 'exact', 'float64' or int, numeric mode of this call ; see evaluateNumeric
+        :return: sympy.Expr, QuantityValue or None if self._value is None
+        """
+        self.logger.log(logging.DEBUG-1, 'getValue()')
+        if self.getExpr() is None:
+            return None
+        if args or kwargs:
+            return self.getExpr().evalf(*args, **kwargs)
+        return evaluateNumeric(self.getExpr(), self._numeric if numeric is None else numeric)
 
-        if err:
-            return emit_error(err)
+    def setNumeric(self, numeric):
+        """Set the numeric mode of the widget's value, and evaluate text again.
 
-        try:
-            expr = quantity_simplify(expr)
-        except TypeError:
-            pass
+        :param numeric: 'exact', 'float64' or int, digits of precision ; see evaluateNumeric
+        """
+        self._numeric = self.lineEdit._numeric = _checkNumeric(numeric)
+        self.lineEdit.setError(self.errorCheck(self))
 
-        u = getDimension(self.getUnits())
+    def getNumeric(self):
+        return self._numeric
 
-        try:
-            unitsAreConsistent(expr, u)
-        except UnitMisMatchError as e:
-            return emit_error(e)
-
-        self.logger.log(logging.DEBUG - 1, 'errorCheck() -> False')
-        expr = convertTo(expr, self.getUnits())
-        self.lineEdit._expr = expr
-        self._value = expr.evalf()
-        self.exprChanged[object].emit(expr)
-        self.valueChanged[object].emit(self._value)
-        self.displayValue.emit(str(expr.evalf(4)))
-        # finish errorCheck, all good
-        return False
+    def getQuantity(self, exact=False):
+        """Get the widget's expression as a QuantityValue in comboBox's selected units.
+        If the expression is None or its magnitude is not a number (eg. has free symbols), returns None.
 
-    def getValue(self, *args, **kwargs):
-        """Get the widget's evaluated expression's value.
-        :param *args, **kwargs: parameters passed to sympy's evalf()
-        :return: sympy.Expr or None if self._value is None
+        :param exact: bool, keep rational magnitudes as Fraction instead of float
+        :return: QuantityValue or None
         """
-        self.logger.log(logging.DEBUG-1, 'getValue()')
         if self.getExpr() is None:
             return None
-        return self.getExpr().evalf(*args, **kwargs)
+        try:
+            return QuantityValue.fromExpr(self.getExpr(), self.getUnits(), exact)
+        except ValueError:
+            return None
+
+    def compile(self, unit=None, symbols=None):
+        """Get a numpy-vectorized callable of the widget's expression, taking its free symbols as arguments.
+        The callable is reused until the widget's expression or units change.
+
+        :param unit: str\\units.Quantity\\sympy.Expr, output units ; default is comboBox's selected units
+        :param symbols: iterable of Symbols, the callable's arguments ; see compileExpr
+        :return: function or None if expression is None
+        """
+        if unit is None:
+            unit = self.getUnits()
+        key = (self.getExpr(), unit, None if symbols is None else tuple(symbols))
+        if self._compiled is None or self._compiled[0] != key:
+            self._compiled = (key, compileExpr(self.getExpr(), unit, symbols))
+        return self._compiled[1]
 
     def setUnits(self, unit):
         """Set comboBox's selected option. If `unit` not an option,
@@ -915,7 +3212,7 @@ class SympyEntryWidget(EntryWidget):
         :param unit: str\\units.Quantity
         :return:
         """
-        self.logger.debug(f"setUnits({repr(unit)})")
+        self.logger.debug("setUnits(%r)", unit)
         ops = self.comboBox.allItems()
         if unit in ops.keys():
             self.logger.log(logging.DEBUG-1, "setUnits() unit in keys")
@@ -931,11 +3228,578 @@ class SympyEntryWidget(EntryWidget):
     label = pyqtProperty(str, lambda s: s._label.text(), lambda s, t: s._label.setText(t))
 
 
+class FormGraph(QObject):
+    """Dependency graph of the expressions of a form, recomputing values incrementally.
+
+    Each node has a name and an expression, usually from a widget (see addWidget) ;
+    the expression's free symbols naming other nodes are its dependencies. Node values
+    are computed by substituting the values of dependencies: a python float when the
+    result is a plain number, a sympy.Expr when it has units or undefined symbols,
+    None when the expression or a dependency has an error.
+
+    When an expression changes, only that node and its downstream nodes are evaluated,
+    in topological order, stopping where a value does not change. Expressions without
+    units are compiled to python floats functions on their first evaluation.
+    Nodes in (or depending on) a dependency cycle get value None and a CycleError.
+
+    Signals:
+        valueChanged(str, object)  # node name, new value
+        cycleDetected(list)  # names of the nodes that cannot be ordered, sorted
+    """
+    valueChanged = pyqtSignal(str, object)
+    cycleDetected = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        QObject.__init__(self, parent)
+        self._exprs = dict()  # {name: sympy.Expr or None}
+        self._symbols = dict()  # {name: {dependency name: Symbol}}
+        self._users = dict()  # {name: set of names of nodes using it}
+        self._funcs = dict()  # {name: compiled float function, or None when it cannot be}
+        self._values = dict()
+        self._errors = dict()
+        self._order = None  # topological order of nodes, None after the structure changed
+        self._blocked = set()  # nodes in or depending on a cycle
+
+    def addWidget(self, widget, name):
+        """Add (or replace) the node for `widget`'s expression, following its changes.
+
+        :param widget: widget with getExpr() and an exprChanged signal (ExprEdit, UnitEdit, SympyEntryWidget...)
+        :param name: str, or SymbolEdit whose Symbol names the node ; the node is renamed when it changes
+        """
+        node = [name.getExpr().name if isinstance(name, SymbolEdit) and name.getExpr() is not None else
+                None if isinstance(name, SymbolEdit) else name]
+
+        def update(*args):
+            if node[0] is not None:
+                self.setExpr(node[0], widget.getExpr())
+        widget.exprChanged.connect(update)
+        if hasattr(widget, 'hasError'):  # errors clear the expression, maybe without exprChanged
+            widget.hasError.connect(update)
+
+        if isinstance(name, SymbolEdit):
+            def rename(*args):
+                symbol = name.getExpr()
+                new = None if symbol is None else symbol.name
+                if new == node[0]:
+                    return
+                if node[0] is not None:
+                    self.removeNode(node[0])
+                node[0] = new
+                update()
+            name.exprChanged.connect(rename)
+            if hasattr(name, 'hasError'):
+                name.hasError.connect(rename)
+        update()
+
+    def setExpr(self, name, expr):
+        """Set the expression of node `name`, adding the node if needed, and recompute.
+
+        :param name: str
+        :param expr: sympy.Expr, str (see parseExpr, as in ExprEdit: unit names stay symbols) or None
+        """
+        if isinstance(expr, str):
+            expr = parseExpr(expr)
+        if name in self._exprs and self._exprs[name] == expr:
+            return
+        symbols = {s.name: s for s in expr.free_symbols} if expr is not None else dict()
+        old = self._symbols.get(name, dict())
+        if name not in self._exprs or set(old) != set(symbols):
+            for dep in old:
+                self._users[dep].discard(name)
+            for dep in symbols:
+                self._users.setdefault(dep, set()).add(name)
+            self._order = None
+        self._exprs[name] = expr
+        self._symbols[name] = symbols
+        self._funcs.pop(name, None)
+        self.recompute([name])
+
+    def removeNode(self, name):
+        """Remove node `name` ; nodes using it see its symbol as undefined."""
+        if name not in self._exprs:
+            return
+        for dep in self._symbols.pop(name):
+            self._users[dep].discard(name)
+        del self._exprs[name]
+        self._funcs.pop(name, None)
+        self._values.pop(name, None)
+        self._errors.pop(name, None)
+        self._order = None
+        self.recompute(self._users.get(name, ()))
+
+    def getExpr(self, name):
+        return self._exprs[name]
+
+    def getValue(self, name):
+        """Get the value of node `name`, see FormGraph.
+
+        :return: float, sympy.Expr or None
+        """
+        return self._values.get(name)
+
+    def getError(self, name):
+        """Get the CycleError of node `name`, or None."""
+        return self._errors.get(name)
+
+    def values(self):
+        """:return: dict {name: value}"""
+        return {name: self._values.get(name) for name in self._exprs}
+
+    def order(self):
+        """Get the nodes in topological order, dependencies first ; nodes in cycles are last.
+
+        :return: list of str
+        """
+        if self._order is None:
+            self._sort()
+        return list(self._order)
+
+    def _sort(self):
+        # Kahn's algorithm over the dependencies that are nodes
+        pending = {name: sum(dep in self._exprs for dep in self._symbols[name]) for name in self._exprs}
+        ready = deque(sorted(name for name, n in pending.items() if n == 0))
+        order = []
+        while ready:
+            name = ready.popleft()
+            order.append(name)
+            for user in sorted(self._users.get(name, ())):
+                pending[user] -= 1
+                if pending[user] == 0:
+                    ready.append(user)
+        blocked = sorted(set(self._exprs) - set(order))
+        self._order = order + blocked
+        self._blocked = set(blocked)
+        if blocked:
+            self.cycleDetected.emit(blocked)
+
+    def recompute(self, names=None):
+        """Evaluate nodes `names` (all when None) and the nodes downstream of them whose inputs changed.
+
+        :param names: iterable of str
+        """
+        resorted, blocked = self._order is None, self._blocked
+        order = self.order()
+        dirty = set(order if names is None else names)
+        if resorted:  # nodes entering or leaving a cycle change even if their inputs did not
+            dirty.update(blocked, self._blocked)
+        for name in order:
+            if name not in dirty:
+                continue
+            if name in self._blocked:
+                value, self._errors[name] = None, CycleError(f"'{name}' is in or depends on a dependency cycle")
+            else:
+                value = self._evaluate(name)
+                self._errors.pop(name, None)
+            if name in self._values and _sameValue(self._values[name], value):
+                continue
+            self._values[name] = value
+            dirty.update(self._users.get(name, ()))
+            self.valueChanged.emit(name, value)
+
+    def _evaluate(self, name):
+        expr = self._exprs[name]
+        if expr is None:
+            return None
+        symbols = self._symbols[name]
+        inputs = dict()
+        for dep, symbol in symbols.items():
+            if dep in self._exprs:
+                value = self._values.get(dep)
+                if value is None:
+                    return None
+                inputs[dep] = value
+
+        if len(inputs) == len(symbols) and all(type(v) is float for v in inputs.values()):
+            func = self._compiled(name)
+            if func is not None:
+                try:
+                    return float(func(*(inputs[dep] for dep in sorted(symbols))))
+                except (ArithmeticError, ValueError, TypeError):
+                    pass  # complex or undefined results, evaluate with sympy instead
+
+        value = expr.xreplace({symbols[dep]: v for dep, v in inputs.items()}).doit().evalf()
+        if value.is_number and not value.has(units.Quantity):
+            try:
+                return float(value)
+            except TypeError:  # complex
+                pass
+        return value
+
+    def _compiled(self, name):
+        try:
+            return self._funcs[name]
+        except KeyError:
+            pass
+        expr, func = self._exprs[name], None
+        if not expr.has(units.Quantity):
+            from sympy import lambdify
+            symbols = self._symbols[name]
+            try:
+                func = lambdify([symbols[dep] for dep in sorted(symbols)], expr, modules='math')
+            except Exception:  # functions without a math equivalent
+                func = None
+        self._funcs[name] = func
+        return func
+
+
+def _sameValue(a, b):
+    """Whether node values `a` and `b` are equal, see FormGraph."""
+    if a is None or b is None:
+        return a is b
+    if type(a) is float or type(b) is float:
+        return type(a) is type(b) and a == b
+    return a == b
+
+
+def _batchTarget(unit=None, dimension=None):
+    """Resolve the target of validateValues.
+
+    :return: (unit expression, dimension vector or units.Dimension values must have)
+    """
+    if unit is not None:
+        unit = _resolveUnit(unit)
+        return unit, dimensionVector(unit) or unit
+    if dimension is None:
+        raise ValueError('validateValues() needs a target unit or dimension')
+    dimension = _parseDimension(dimension)
+    if not isinstance(dimension, units.Dimension):
+        raise ValueError(f"Invalid dimension '{dimension}'")
+    return _baseUnits(dimensionVector(dimension)), dimensionVector(dimension) or dimension
+
+
+# errors that are a property of a value, not of the batch ; ValueError covers ExpressionError,
+# UnitMisMatchError and sympy's SympifyError
+_valueErrors = (ValueError, TypeError, ArithmeticError, NotImplementedError)
+
+
+def _validateValue(row, text, unit, dimension, quantity=False):
+    """Parse, dimension-check and convert one value, see validateValues.
+
+    :return: dict
+    """
+    record = dict(row=row, input=text, value=None, unit=str(unit), error=None)
+    try:
+        expr = parseUnits(text)
+        if expr is None:
+            raise ExpressionError('Empty value')
+        unitsAreConsistent(expr, dimension)
+        magnitude = (convertTo(expr, unit) / unit).evalf()
+        try:
+            record['value'] = float(magnitude)
+            if quantity:
+                record['value'] = QuantityValue(record['value'], _unitKey(unit))
+        except TypeError:  # free symbols or complex
+            record['value'] = str(magnitude)
+    except _valueErrors as e:
+        record['error'] = f'{type(e).__name__}: {e}'
+    return record
+
+
+_unitPrefix = 'units.'  # name prefix of the Symbols standing for units in encoded expressions
+_quantitiesByName = None
+
+
+def encodeExpr(expr):
+    """Get a compact, picklable str of `expr`: its srepr, with each units.Quantity written
+    as Symbol('units.<name>'), so it can be rebuilt without the unit catalogs' objects.
+
+    :param expr: sympy.Expr
+    :return: str, see decodeExpr
+    """
+    from sympy.core.parameters import evaluate
+    with evaluate(False):  # keep the structure of parsed text
+        return srepr(expr.xreplace({q: Symbol(_unitPrefix + str(q)) for q in expr.atoms(units.Quantity)}))
+
+
+def decodeExpr(text):
+    """Rebuild an expression from encodeExpr.
+    `text` may only call sympy's constructors, as srepr writes them, with numbers, names
+    of symbols and functions, and other constructor calls ; it is evaluated without builtins.
+
+    :param text: str
+    :raises ExpressionError: if `text` is anything else
+    :return: sympy.Expr
+    """
+    global _quantitiesByName
+    if _quantitiesByName is None:
+        _quantitiesByName = {str(q): q for q in list(vars(units).values()) + list(unitSubs.values())
+                             if isinstance(q, units.Quantity)}
+    names = _decodeGlobals()
+    try:
+        tree = ast.parse(text, mode='eval')
+    except SyntaxError:
+        raise ExpressionError('Not an encoded expression')
+    if not _decodable(tree.body, names):
+        raise ExpressionError('Not an encoded expression')
+    from sympy.core.parameters import evaluate
+    with evaluate(False):  # keep the structure of parsed text
+        expr = eval(compile(tree, '<encoded>', 'eval'), names)
+        return expr.xreplace({s: _quantitiesByName[s.name[len(_unitPrefix):]] for s in expr.free_symbols
+                              if s.name.startswith(_unitPrefix)})
+
+
+_decodeDict = None
+_decodeNamed = ('Symbol', 'Dummy', 'Function', 'Float')  # constructors taking a str, see _decodable
+
+
+def _decodeGlobals():
+    """Namespace of decodeExpr: sympy's classes and singletons, no builtins."""
+    global _decodeDict
+    if _decodeDict is None:
+        import sympy
+        rv = {k: v for k, v in vars(sympy).items()
+              if isinstance(v, Basic) or isinstance(v, type) and issubclass(v, Basic)}
+        rv['__builtins__'] = {}
+        _decodeDict = rv
+    return _decodeDict
+
+
+def _decodable(node, names):
+    """Whether ast `node` only calls `names` with numbers, str names (see _decodeNamed) and other calls."""
+    if isinstance(node, ast.Constant):
+        return isinstance(node.value, (int, float)) or node.value is None
+    if isinstance(node, ast.Name):
+        return node.id in names and not node.id.startswith('_')
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return _decodable(node.operand, names)
+    if not isinstance(node, ast.Call):
+        return False
+    func = node.func
+    if isinstance(func, ast.Call):  # Function('f')(...)
+        named = False
+        if not _decodable(func, names):
+            return False
+    elif isinstance(func, ast.Name) and _decodable(func, names):
+        named = func.id in _decodeNamed
+    else:
+        return False
+    for arg in node.args:
+        if named and isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            continue
+        if not _decodable(arg, names):
+            return False
+    return all(k.arg is not None and _decodable(k.value, names) for k in node.keywords)
+
+
+def _parseValue(row, text):
+    """Parse one value to a picklable record, see ParserPool.parse.
+
+    :return: dict
+    """
+    record = dict(row=row, input=text, expr=None, error=None)
+    try:
+        expr = parseUnits(text)
+        if expr is not None:
+            record['expr'] = encodeExpr(expr)
+    except _valueErrors as e:
+        record['error'] = f'{type(e).__name__}: {e}'
+    return record
+
+
+def _validateChunk(chunk, unit, dimension, quantity=False):
+    """Validate a chunk of (row, text) in a worker process."""
+    return [_validateValue(row, text, unit, dimension, quantity) for row, text in chunk]
+
+
+def _parseChunk(chunk):
+    """Parse a chunk of (row, text) in a worker process."""
+    return [_parseValue(row, text) for row, text in chunk]
+
+
+def _warmWorker():
+    """Build the unit catalogs and the parser's namespace, and run parse and conversion once,
+    so the first values a process gets do not pay for them. See ParserPool.
+    """
+    len(unitSubs)  # builds every category it covers
+    for name in _storage.categories:
+        getattr(_storage, name)
+    for family in CommonUnits.families:
+        getattr(CommonUnits, family)
+    unitAliases.alias('')
+    _parseGlobals()
+    convertTo(parseUnits('1*inch + 1*mm'), 'mm')
+
+
+class ParserPool():
+    """Pool of worker processes parsing and validating batches of text.
+
+    Workers are started when the pool is created, and warmed up once (unit catalogs,
+    parser namespace) by an initializer ; the catalogs are also built in this process
+    first, so workers started by fork inherit them. Values are sent in chunks, at most
+    two per worker in flight, and results come back in input order as small dicts of
+    str/float, instead of pickled sympy objects.
+
+        with ParserPool(4) as pool:
+            for record in pool.validate(open('values.txt'), unit='inch'):
+                ...
+
+    :param workers: int, processes ; None for os.cpu_count()
+    :param chunkSize: int, values sent to a worker at once
+    """
+    def __init__(self, workers=None, chunkSize=1000):
+        from concurrent.futures import ProcessPoolExecutor, wait
+        self.workers = workers or os.cpu_count() or 1
+        self.chunkSize = chunkSize
+        _warmWorker()
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_warmWorker)
+        wait([self._executor.submit(os.getpid) for _ in range(self.workers)])
+
+    def _map(self, func, values, *args):
+        from itertools import islice
+        rows = enumerate(values, 1)
+        pending = deque()
+        while True:
+            while len(pending) < 2 * self.workers:
+                chunk = list(islice(rows, self.chunkSize))
+                if not chunk:
+                    break
+                pending.append(self._executor.submit(func, chunk, *args))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+    def parse(self, values):
+        """Parse each of `values` with parseUnits.
+
+        :param values: iterable of str
+        :return: generator of dict(row, input, expr, error) ; expr is str from encodeExpr,
+            None when empty or on error ; error is None or str, 'ErrorType: message'
+        """
+        return self._map(_parseChunk, values)
+
+    def validate(self, values, unit=None, dimension=None, quantity=False):
+        """Parse, dimension-check and convert each of `values`, see validateValues.
+
+        :return: generator of dict(row, input, value, unit, error)
+        """
+        return self._map(_validateChunk, values, *_batchTarget(unit, dimension), quantity)
+
+    def close(self):
+        """Stop the worker processes."""
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def validateValues(values, unit=None, dimension=None, workers=1, chunkSize=1000, quantity=False):
+    """Parse, dimension-check and convert each of `values`, yielding one record per value, in order.
+    Values are consumed lazily ; with `workers` > 1 they are validated in a ParserPool,
+    so memory does not grow with the input.
+
+    Values must include units of the dimension of `unit`, as in SympyEntryWidget,
+    or of `dimension`, in which case they are converted to SI base units.
+
+    Records are dicts:
+        row: int, position of the value in `values`, starting at 1
+        input: str
+        value: float magnitude in `unit`, str if it is symbolic, None on error ;
+               QuantityValue instead of float when `quantity`
+        unit: str, units of value
+        error: None or str, 'ErrorType: message'
+
+    :param values: iterable of str
+    :param unit: str\\units.Quantity\\sympy.Expr, target units
+    :param dimension: str\\units.Dimension, target dimension when `unit` is None
+    :param workers: int, processes ; None for os.cpu_count()
+    :param chunkSize: int, values sent to a worker at once
+    :param quantity: bool, give numeric values as QuantityValue
+    :return: generator of dict
+    """
+    unit, dimension = _batchTarget(unit, dimension)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for row, text in enumerate(values, 1):
+            yield _validateValue(row, text, unit, dimension, quantity)
+        return
+    with ParserPool(workers, chunkSize) as pool:
+        yield from pool.validate(values, unit, dimension, quantity)
+
+
+def _batchInput(stream, column=None):
+    """Values of a text stream, one per line, or from `column` (name or index) of a CSV stream with a header."""
+    if column is None:
+        for line in stream:
+            yield line.rstrip('\r\n')
+        return
+    import csv
+    reader = csv.reader(stream)
+    header = next(reader, [])
+    index = header.index(column) if column in header else int(column)
+    for fields in reader:
+        yield fields[index] if index < len(fields) else ''
+
+
+def main(argv=None):
+    """Command line batch validation, see `python -m sympyentrywidget --help`.
+
+    :return: exit status, 1 if any value had an error
+    """
+    import argparse
+    import csv
+    parser = argparse.ArgumentParser(
+        prog='python -m sympyentrywidget',
+        description='Parse, dimension-check and convert values, one per line (or from a CSV column). '
+                    'Without arguments, installs the Qt Designer plugin.')
+    parser.add_argument('input', nargs='?', default='-', help="input file, '-' for stdin (default)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('-u', '--unit', help="convert values to this unit, eg. 'inch', 'kg/m^3'")
+    target.add_argument('-d', '--dimension', help="require values of this dimension, eg. 'length/time', "
+                                                  "converted to SI base units")
+    parser.add_argument('-c', '--column', help='read the input as CSV with a header, values from this column '
+                                               '(name or index)')
+    parser.add_argument('-f', '--format', choices=('csv', 'ndjson'), default='csv', help='output format')
+    parser.add_argument('-o', '--output', default='-', help="output file, '-' for stdout (default)")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='worker processes, default 1 ; 0 for all cores')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='values sent to a worker at once')
+    opts = parser.parse_args(argv)
+
+    try:
+        _batchTarget(opts.unit, opts.dimension)
+    except (ValueError, TypeError) as e:
+        parser.error(str(e))
+
+    infile = sys.stdin if opts.input == '-' else open(opts.input, newline='')
+    outfile = sys.stdout if opts.output == '-' else open(opts.output, 'w', newline='')
+    fields = ('row', 'input', 'value', 'unit', 'error')
+    errors = 0
+    try:
+        if opts.format == 'csv':
+            writer = csv.DictWriter(outfile, fields, lineterminator='\n')
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(record):
+                outfile.write(json.dumps(record) + '\n')
+        for record in validateValues(_batchInput(infile, opts.column), opts.unit, opts.dimension,
+                                     opts.workers or None, opts.chunk_size):
+            errors += record['error'] is not None
+            write(record)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    return 1 if errors else 0
+
+
 __all__ = ['AutoColorLineEdit', 'EntryWidget', 'SymbolEdit', 'ExprEdit', 'UnitEdit', 'DimensionEdit',
            'SympyEntryWidget', 'units', 'unitSubs', 'UnitMisMatchError',
-           'ExpressionError', 'unitsAreConsistent', 'parseExpr', 'parseUnits',
-           'convertTo', 'getDimension', 'CommonUnits']
+           'ExpressionError', 'PipelineStats', 'unitsAreConsistent', 'parseExpr', 'parseUnits',
+           'convertTo', 'getDimension', 'CommonUnits', 'UnitAliases', 'unitAliases', 'ParseCache', 'parseCache',
+           'buildUnitCatalog', 'unitCatalogPath', 'scanExpr', 'setTraceHandler', 'dimensionVector', 'vectorDimension',
+           'conversionFactor', 'convertArray', 'QuantityValue', 'evaluateNumeric', 'compileExpr', 'validateValues', 'ParserPool',
+           'encodeExpr', 'decodeExpr', 'FormGraph', 'CycleError',
+           'baseDimensions', 'dimensionless']
 
 if __name__ == '__main__':
+    import sys
+    if len(sys.argv) > 1:
+        sys.exit(main())
     from qt_utils.designer import install_plugin_files
     install_plugin_files('sympyentrywidget_designer_plugin.py')
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def unit_catalog_cache(tmp_path, monkeypatch):
+    # unit catalog snapshots go to the test's directory, never the user cache
+    monkeypatch.setenv('SYMPYENTRYWIDGET_CACHE', str(tmp_path))
@@ -1,5 +1,6 @@
 import pytest
-from sympyentrywidget import SympyEntryWidget, units, UnitMisMatchError, parseExpr, parseUnits, quantity_simplify
+from sympyentrywidget import SympyEntryWidget, units, UnitMisMatchError, parseExpr, parseUnits, quantity_simplify, \
+    parseCache, convertTo
 from sympy import Symbol
 from qt_utils.helpers_for_tests import *
 from qt_utils import getCurrentColor
@@ -122,3 +123,116 @@ def test_option_changes_value(qtbot):
     assert widget.getError() is False
     assert widget.getValue() == .25
     assert (widget.convertTo(units.inch) - .25*units.inch ) == 0.0
+
+
+def test_option_change_rescales(qtbot):
+    widget = SympyEntryWidget(text='2*b*inch + 3*mm', options={'mm': units.mm, 'inch': units.inch, 'kg': units.kg})
+    show(locals())
+    expected = units.convert_to(parseUnits('2*b*inch + 3*mm'), units.inch)
+    parseCache.clear()
+    widget.setUnits('inch')
+    assert widget.getError() is False
+    assert widget.getExpr() == expected
+    widget.setUnits('kg')
+    assert isinstance(widget.getError(), UnitMisMatchError)
+    assert widget.getExpr() is None
+    widget.setUnits('mm')
+    assert widget.getError() is False
+    assert parseCache.info()['misses'] == 0
+
+    widget.setText('3')
+    assert widget.getError()
+    assert parseCache.info()['misses'] == 1
+
+    # a custom errorCheck runs on option changes, not re-scaling
+    checked = []
+
+    class Checked(SympyEntryWidget):
+        @staticmethod
+        def errorCheck(self):
+            checked.append(self.getUnits())
+            return SympyEntryWidget.errorCheck(self)
+    widget = Checked(text='2*inch', options={'mm': units.mm, 'inch': units.inch})
+    widget.setUnits('inch')
+    assert checked[-1] == units.inch
+
+
+def test_compile(qtbot):
+    widget = SympyEntryWidget(text='2*b*inch', options={'mm': units.mm, 'inch': units.inch})
+    show(locals())
+    func = widget.compile()
+    assert widget.compile() is func
+    assert [s.name for s in func.symbols] == ['b']
+    assert abs(func(1.) - 50.8) < 1e-12
+
+    widget.setUnits('inch')
+    assert widget.compile() is not func
+    assert widget.compile()(1.) == 2.
+
+    widget.setText('2*b*inch + ')
+    assert widget.compile() is None
+
+
+def test_quantity(qtbot):
+    widget = SympyEntryWidget(text='1*inch', options={'mm': units.mm, 'inch': units.inch})
+    show(locals())
+    assert widget.getQuantity().unit == 'mm' and widget.getQuantity().magnitude == pytest.approx(25.4)
+    widget.setUnits('inch')
+    assert widget.getQuantity(exact=True).magnitude == 1
+    widget.setText('2*b*inch')
+    assert widget.getQuantity() is None
+
+
+def test_numeric(qtbot):
+    widget = SympyEntryWidget(text='3*mm + 1*inch', options={'mm': units.mm, 'inch': units.inch}, numeric='float64')
+    show(locals())
+    values = []
+    widget.valueChanged[object].connect(values.append)
+    assert float(widget.getValue()) == pytest.approx(28.4) and widget.getValue().unit == 'mm'
+    assert widget.getValue(numeric='exact') == widget.getExpr()
+    widget.setUnits('inch')
+    assert float(values[-1]) == pytest.approx(28.4 / 25.4)
+    assert widget.output.text() == '1.118'
+    widget.setNumeric('exact')
+    assert values[-1] == widget.getExpr() == convertTo(parseUnits('3*mm + 1*inch'), units.inch)
+    assert widget.getNumeric() == 'exact'
+    with pytest.raises(ValueError):
+        widget.setNumeric(0)
+
+
+def test_signal_overloads(qtbot):
+    widget = SympyEntryWidget(text='1*inch', options={'mm': units.mm, 'inch': units.inch})
+    show(locals())
+    exprs, values = [], []
+    widget.exprChanged[str].connect(exprs.append)
+    widget.valueChanged.connect(lambda: values.append(None))
+    widget.setUnits('inch')
+    assert exprs == ['inch'] and values == [None]
+
+
+def test_stats(qtbot):
+    widget = SympyEntryWidget(text='3*mm', options={'mm': units.mm, 'inch': units.inch}, collectStats=True)
+    show(locals())
+    slow = []
+    widget.slowEvaluation.connect(slow.append)
+    parseCache.clear()
+    widget.setText('3*mm + 1*inch')
+    stats = widget.stats()
+    assert {'parse', 'convert', 'evalf', 'signals', 'total'} <= set(stats)
+    assert stats['total']['count'] == 2
+    assert sum(stats['total']['histogram']) == 2
+    assert slow == []
+
+    widget.setSlowThreshold(0)
+    assert widget.getSlowThreshold() == 0
+    widget.setUnits('inch')
+    assert len(slow) == 1 and slow[0] > 0
+    assert widget.stats()['total']['count'] == 3
+
+    # not timed unless stats or a slow threshold are asked for
+    widget = SympyEntryWidget(text='3*mm', options={'mm': units.mm, 'inch': units.inch})
+    widget.setText('4*mm')
+    assert 'total' not in widget.stats()
+    widget.setCollectStats(True)
+    widget.setText('5*mm')
+    assert widget.stats()['total']['count'] == 1
@@ -1,5 +1,6 @@
 import pytest
-from sympyentrywidget import ExprEdit, parseExpr
+from sympyentrywidget import ExprEdit, SymbolEdit, FormGraph, parseExpr
+import sympyentrywidget
 from . import expr_safe_check
 from qt_utils.helpers_for_tests import *
 from qt_utils import getCurrentColor
@@ -101,3 +102,82 @@ def test_basic_math(qtbot):
     assert widget.getExpr() != parseExpr('-2 + pi').evalf()
     assert widget.getValue() == parseExpr('-2 + pi').evalf()
 
+
+
+def test_unchanged_tokens_skip_evaluation(qtbot):
+    widget = ExprEdit(text='3*x + 2', collectStats=True)
+    show(locals())
+    expr = widget.getExpr()
+    emitted = []
+    widget.exprChanged[object].connect(emitted.append)
+    count = widget.stats()['total']['count']
+
+    for text in ['3*x + 2 ', '3 * x+2', '3*x + 2']:
+        widget.setText(text)
+        assert widget.getExpr() is expr
+        assert widget.getError() is False
+    assert emitted == []
+    assert widget.stats()['total']['count'] == count
+
+    widget.setText('3*x + 2 +')
+    assert widget.getError()
+    widget.setText('3*x + 2  + ')
+    assert widget.getError()
+    widget.setText('3*x + 3')
+    assert emitted == [None, widget.getExpr()]  # once for the error, the same error is skipped
+
+
+def test_form_graph_widgets(qtbot):
+    name = SymbolEdit(text='width')
+    width = ExprEdit(text='3')
+    area = ExprEdit(text='width*height')
+    height = ExprEdit(text='2')
+    show(locals())
+    graph = FormGraph()
+    graph.addWidget(width, name)
+    graph.addWidget(area, 'area')
+    graph.addWidget(height, 'height')
+    assert graph.getValue('area') == 6.
+
+    width.setText('4')
+    assert graph.getValue('area') == 8.
+    width.setText('4 +')
+    assert graph.getValue('width') is None
+    assert graph.getValue('area') is None
+    width.setText('5')
+    assert graph.getValue('area') == 10.
+
+    name.setText('w')
+    assert graph.getValue('w') == 5.
+    assert 'width' not in graph.values()
+    assert graph.getValue('area') == 2.0 * Symbol('width')
+
+
+def test_simplify_budget(qtbot):
+    widget = ExprEdit(text='sin(x)**2 + cos(x)**2', simplifyBudget=5)
+    show(locals())
+    degraded = []
+    widget.simplifyDegraded.connect(degraded.append)
+    assert widget.getExpr() == 1 and widget.isDegraded() is False
+
+    widget.setSimplifyBudget(5, ops=3)
+    assert widget.getSimplifyBudget() == (5, 3)
+    assert widget.isDegraded() is True and degraded == ['canonical']
+    assert widget.getError() is False
+
+    widget.setSimplifyBudget(None)
+    assert widget.getExpr() == 1 and widget.isDegraded() is False
+
+
+def test_signal_overloads(qtbot):
+    widget = ExprEdit()
+    show(locals())
+    widget.setText('2*x + 1')
+    assert sympyentrywidget._printed[0] is not widget.getExpr()  # nobody listens to str overloads
+
+    texts, values, bare = [], [], []
+    widget.exprChanged[str].connect(texts.append)
+    widget.valueChanged[str].connect(values.append)
+    widget.exprChanged.connect(lambda: bare.append(None))
+    widget.setText('3*x + 1')
+    assert texts == ['3*x + 1'] and values == ['3.0*x + 1.0'] and bare == [None]
@@ -1,10 +1,11 @@
 import pytest
 from sympyentrywidget import (UnitEdit, unitSubs, units, UnitMisMatchError,
-                              unitsAreConsistent, parseUnits)
+                              unitsAreConsistent, parseUnits, ExpressionError)
 from . import units_work_check
 from qt_utils.helpers_for_tests import *
 from qt_utils import getCurrentColor
 from sympy import Symbol
+from fractions import Fraction
 from sympy.parsing.sympy_parser import parse_expr
 import logging
 import sys
@@ -46,6 +47,31 @@ def test_constructor_units(qtbot):
     assert widget.getValue() == widget.getUnits() * widget.getMagnitude()
 
 
+def test_quantity(qtbot):
+    widget = UnitEdit(text='2.0*mm')
+    show(locals())
+    assert widget.getQuantity().magnitude == 2. and widget.getQuantity().unit == 'mm'
+
+    widget.setText('1*inch + 2*mm')
+    assert widget.getUnits() == units.inch
+    assert widget.getQuantity(exact=True).magnitude == Fraction(137, 127)
+    widget.setText('2*x*mm')
+    assert widget.getQuantity() is None
+
+
+def test_numeric(qtbot):
+    widget = UnitEdit(text='1*inch + 2*mm', numeric='float64')
+    show(locals())
+    assert widget.getValue().unit == 'inch' and float(widget.getValue()) == pytest.approx(27.4 / 25.4)
+    assert widget.convertTo('mm', eval=True).magnitude == pytest.approx(27.4)
+    assert widget.convertTo('mm', numeric=20) == widget.convertTo('mm').evalf(20)
+    widget.setNumeric('exact')
+    assert widget.getValue() == Fraction(137, 127) * units.inch
+    widget.setText('2*x*mm')
+    widget.setNumeric('float64')
+    assert widget.getValue() == parseUnits('2*x*mm').evalf()
+
+
 def test_unit_consistency(qtbot):
     widget = UnitEdit()
     show(locals())
@@ -95,3 +121,34 @@ def test_invalid_conversion(qtbot):
     assert (widget.convertTo('kg') - parseUnits('2*mm')).simplify() == 0
     assert (widget.convertTo(units.m*units.m) - parseUnits('1*m/500')).simplify() == 0
     assert (widget.convertTo(units.m) - parseUnits('1*m/500')).simplify() == 0
+
+
+def test_async_evaluation(qtbot):
+    widget = UnitEdit(text='2*mm', asyncEvaluation=True)
+    show(locals())
+    assert widget.asyncEvaluation is True
+
+    widget.setText('3*mm')
+    widget.setText('4*mm + ')
+    widget.setText('5*inch')
+    assert widget.isEvaluating()
+    qtbot.waitUntil(lambda: not widget.isEvaluating())
+    assert widget.getError() is False
+    assert widget.getExpr() == 5*units.inch
+
+    widget.setText('5*inch + ')
+    qtbot.waitUntil(lambda: not widget.isEvaluating())
+    assert widget.getError()
+    assert widget.getExpr() is None
+
+    def broken(text):
+        raise RuntimeError('bug')
+    widget._evaluator.run(broken, 'text')
+    qtbot.waitUntil(lambda: not widget.isEvaluating())
+    assert isinstance(widget.getError(), ExpressionError)
+    assert widget.getExpr() is None
+
+    widget.setAsyncEvaluation(False)
+    widget.setText('1*mm')
+    assert widget.isEvaluating() is False
+    assert widget.getExpr() == parseUnits('1*mm')